@@ -0,0 +1,131 @@
+#######################
+# awrite.py - check the editorTerminal asyncio output queue under CPython asyncio
+#
+# Several producer coroutines write log lines with awrite() into a small queue, as str,
+# UTF-8 bytes and a memoryview of a reused buffer, while renderTask() draws them on a
+# headless editorTerminal.  Checks the backpressure (the queue never holds more than
+# queueSize characters and the producers had to wait), that every character was drained,
+# that there was at most one refresh per drain, and that the final screen is the same as
+# writing the text directly.  Reports the drains, refreshes and tile writes, and exits
+# with 1 if a check failed.
+#
+# How to use:
+#   python benchmarks/awrite.py
+#   python benchmarks/awrite.py --producers 5 --lines 500 --queue 512
+##############################
+
+import argparse
+import asyncio
+import os
+import sys
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_here, "..", "headless"))
+sys.path.insert(0, os.path.join(_here, ".."))
+
+import displayio  # the headless stand-in
+from simpleTerminal import editorTerminal
+
+
+class checkedEditor(editorTerminal):
+    # records the queued text in order, the queue length and the drains
+
+    def __init__(self, *args, **kwargs):
+        editorTerminal.__init__(self, *args, **kwargs)
+        self.written = []  # the text in the order it was queued
+        self.maxQueued = 0
+        self.waits = 0  # awrite() calls that found the queue full
+        self.drains = 0
+        self.drained = 0  # characters drained
+
+    async def awrite(self, text):
+        if self._queued and self._queued + len(text) > self.queueSize:
+            self.waits += 1
+        await editorTerminal.awrite(self, text)
+        # no await since the text was queued, so the order is kept
+        self.written.append(bytes(text) if isinstance(text, memoryview) else text)
+        self.maxQueued = max(self.maxQueued, self._queued)
+
+    def drainQueue(self):
+        count = editorTerminal.drainQueue(self)
+        if count:
+            self.drains += 1
+            self.drained += count
+        return count
+
+
+async def producer(editor, name, lines, kind):
+    # kind 0 writes str, 1 UTF-8 bytes and 2 a memoryview of a reused bytearray
+    buffer = bytearray(64)
+    for i in range(lines):
+        text = "{} line {} 21.{}\u00b0C\r\n".format(name, i, i % 10)
+        if kind == 0:
+            await editor.awrite(text)
+        elif kind == 1:
+            await editor.awrite(text.encode())
+        else:
+            data = text.encode()
+            buffer[: len(data)] = data
+            await editor.awrite(memoryview(buffer)[: len(data)])
+        if i % 10 == 0:
+            await asyncio.sleep(0)  # let the other producers in
+
+
+async def run(args):
+    display = displayio.Display(240, 240)
+    editor = checkedEditor(display, 240, 240, targetFPS=args.fps, queueSize=args.queue)
+    displayio.resetCounters()
+    renderer = asyncio.create_task(editor.renderTask())
+    await asyncio.gather(
+        *(producer(editor, "p{}".format(i), args.lines, i % 3) for i in range(args.producers))
+    )
+    while editor._queued:  # wait for the renderer to draw the rest
+        await asyncio.sleep(1 / args.fps)
+    renderer.cancel()
+    return editor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="check the editorTerminal asyncio queue")
+    parser.add_argument("--producers", type=int, default=3, help="coroutines writing lines")
+    parser.add_argument("--lines", type=int, default=200, help="lines per producer")
+    parser.add_argument("--queue", type=int, default=256, help="queueSize of the editor")
+    parser.add_argument("--fps", type=float, default=200, help="targetFPS of the editor")
+    args = parser.parse_args()
+
+    editor = asyncio.run(run(args))
+    counters = dict(displayio.counters)
+    written = editor.written
+    expected = editorTerminal(displayio.Display(240, 240), 240, 240)
+    for text in written:
+        expected.write(text)
+
+    total = sum(len(text) for text in written)
+    print(
+        "{} writes, {} characters in {} drains, {} refreshes, {} tile writes".format(
+            len(written), total, editor.drains, counters["refreshes"], counters["cellWrites"]
+        )
+    )
+    print("max queued {} of {}, {} writes waited".format(editor.maxQueued, args.queue, editor.waits))
+    failures = []
+    if len(written) != args.producers * args.lines:
+        failures.append("{} writes were queued".format(len(written)))
+    if editor.maxQueued > args.queue:
+        failures.append("the queue held more than queueSize")
+    if editor.waits == 0:
+        failures.append("no producer waited for the queue")
+    if editor.drained != total or editor._queue:
+        failures.append("{} of {} characters were drained".format(editor.drained, total))
+    if counters["refreshes"] > editor.drains:
+        failures.append("more refreshes than drains")
+    if editor.mainTerminal.buffer != expected.mainTerminal.buffer:
+        failures.append("the screen differs from writing the text directly")
+    for failure in failures:
+        print("FAILED: " + failure)
+    if failures:
+        sys.exit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+#######################
+# benchmark.py - CPython benchmarks for simpleTerminal and editorTerminal
+#
+# Runs the terminals on the headless displayio/terminalio stand-in (see headless/)
+# and reports the time and the number of tile reads, tile writes and display refreshes
+# for the hot paths, over several grid sizes.
+#
+# How to use:
+#   python benchmarks/benchmark.py                      # print a table
+#   python benchmarks/benchmark.py --json results.json  # also save machine readable results
+#   python benchmarks/benchmark.py --compare results.json
+#       compare against saved results, exits with 1 if an operation got slower than the
+#       tolerance or uses more tile writes, tile reads or refreshes than before.
+#       The counts are exact, the timings depend on the machine so use them for trends.
+##############################
+
+import argparse
+import json
+import os
+import sys
+import time
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_here, "..", "headless"))
+sys.path.insert(0, os.path.join(_here, ".."))
+
+import displayio  # the headless stand-in
+from simpleTerminal import simpleTerminal, editorTerminal
+
+# (columns, rows) of the text grids to measure, 40x17 is a 240x240 display
+GRID_SIZES = ((20, 8), (40, 17), (80, 30))
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+)
+
+
+def textLines(count, width, seed=0):
+    # deterministic lines of varying length, like source code
+    lines = []
+    for i in range(count):
+        start = (i * 7 + seed * 13) % len(LOREM)
+        length = (i * 11 + seed) % width
+        lines.append((" " * (i % 4) * 2 + (LOREM * 2)[start : start + length])[:width])
+    return lines
+
+
+ROUNDS = 5  # the fastest of this many rounds is reported
+
+
+def measure(name, columns, rows, setup, run, repeat, ringScroll=None):
+    # time repeat calls of run(state) and count the displayio work they do
+    state = setup()
+    run(state)  # warm up
+    seconds = None
+    for _ in range(ROUNDS):
+        displayio.resetCounters()
+        start = time.perf_counter()
+        for i in range(repeat):
+            run(state)
+        elapsed = time.perf_counter() - start
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+    result = {
+        "name": name,
+        "columns": columns,
+        "rows": rows,
+        "repeat": repeat,
+        "seconds": seconds,
+        "usPerOp": seconds * 1e6 / repeat,
+        "cellWritesPerOp": displayio.counters["cellWrites"] / repeat,
+        "cellReadsPerOp": displayio.counters["cellReads"] / repeat,
+        "refreshesPerOp": displayio.counters["refreshes"] / repeat,
+    }
+    if ringScroll is not None:
+        result["ringScroll"] = ringScroll
+    return result
+
+
+def benchWrite(columns, rows, scale):
+    # write() throughput: a screen of text lines with \r\n, written from the top left
+    lines = textLines(rows - 1, columns)
+    text = "\r\n".join(lines)
+
+    def setup():
+        return simpleTerminal(rows=rows, columns=columns)
+
+    def run(terminal):
+        terminal.setCursor(0, 0)
+        terminal.write(text)
+        terminal.setCursor(0, 0)
+        terminal.write(text.upper())  # so every cell changes
+
+    result = measure("write", columns, rows, setup, run, 50 * scale)
+    result["charsPerSecond"] = 2 * len(text) / (result["seconds"] / result["repeat"])
+    return [result]
+
+
+def benchScroll(columns, rows, scale):
+    # scrollUp/scrollDown latency on a full screen of text, for both scrolling modes.
+    # Each operation scrolls one line and writes the next line into the exposed row.
+    results = []
+    lines = textLines(rows + 1, columns)
+    for ringScroll in (False, True):
+
+        def setup():
+            terminal = simpleTerminal(rows=rows, columns=columns, ringScroll=ringScroll)
+            terminal.write("\r\n".join(lines[:rows]))
+            return [terminal, 0]
+
+        def runDown(state):
+            terminal = state[0]
+            terminal.scrollDown()
+            terminal.setCursor(0, rows - 1)
+            terminal.write(lines[state[1] % len(lines)])
+            state[1] += 1
+
+        def runUp(state):
+            terminal = state[0]
+            terminal.scrollUp()
+            terminal.setCursor(0, 0)
+            terminal.write(lines[state[1] % len(lines)])
+            state[1] += 1
+
+        results.append(
+            measure("scrollDown", columns, rows, setup, runDown, 200 * scale, ringScroll)
+        )
+        results.append(
+            measure("scrollUp", columns, rows, setup, runUp, 200 * scale, ringScroll)
+        )
+    return results
+
+
+def benchClearAll(columns, rows, scale):
+    text = "\r\n".join(textLines(rows, columns))
+
+    def setup():
+        return simpleTerminal(rows=rows, columns=columns)
+
+    def run(terminal):
+        terminal.setCursor(0, 0)
+        terminal.write(text)
+        terminal.clearAll()
+
+    return [measure("write+clearAll", columns, rows, setup, run, 50 * scale)]
+
+
+def benchLogDump(columns, rows, scale):
+    # a 500 line log written with autoWrap in one write() call, the lines are longer
+    # than the screen is wide so they wrap
+    text = "".join(
+        "{:04d} {}\r\n".format(i, line)
+        for i, line in enumerate(textLines(500, columns + columns // 2))
+    )
+
+    texts = (text, text.upper())  # so the final screen differs between the runs
+
+    def setup():
+        return [simpleTerminal(rows=rows, columns=columns, autoWrap=True), 0]
+
+    def run(state):
+        state[0].write(texts[state[1] % 2])
+        state[1] += 1
+
+    # the same log through an editorTerminal, whose main terminal does not wrap: the lines
+    # are cut at the right edge and each new line on the bottom row scrolls
+    editorTexts = tuple(
+        "".join(line[:columns] + "\r\n" for line in text.split("\r\n")) for text in texts
+    )
+
+    def editorSetup():
+        display = displayio.Display(columns * 6, rows * 14)
+        return [editorTerminal(display, display.width, display.height), 0]
+
+    def editorRun(state):
+        state[0].write(editorTexts[state[1] % 2])
+        state[1] += 1
+
+    return [
+        measure("logDump", columns, rows, setup, run, 2 * scale),
+        measure("editorLogDump", columns, rows, editorSetup, editorRun, 2 * scale),
+    ]
+
+
+def benchRender(columns, rows, scale):
+    # render() of a dashboard style frame where one number changes each frame
+    lines = textLines(rows, columns)
+
+    def setup():
+        terminal = simpleTerminal(rows=rows, columns=columns)
+        terminal.render(lines)
+        return [terminal, 0]
+
+    def run(state):
+        frame = list(lines)
+        frame[state[1] % rows] = "count: {}".format(state[1])
+        state[0].render(frame)
+        state[1] += 1
+
+    return [measure("render", columns, rows, setup, run, 200 * scale)]
+
+
+def editorRedrawTrace(rows, columns, seed):
+    # The output of a pye full screen redraw: every text line at its row followed by
+    # clear to end of line, then the status line and the cursor position.
+    chunks = ["\x1b[?25l"]
+    for row, line in enumerate(textLines(rows - 1, columns, seed)):
+        chunks.append("\x1b[{};1H".format(row + 1))
+        chunks.append(line)
+        chunks.append("\x1b[0K")
+    chunks.append("\x1b[{};1H\x1b[1;37;46m".format(rows))
+    chunks.append("main.py Row: {}/200 Col: 1  ".format(seed + 1))
+    chunks.append("\x1b[0K\x1b[0m")
+    chunks.append("\x1b[{};1H\x1b[?25h".format(seed % (rows - 1) + 1))
+    return chunks
+
+
+def editorScrollTrace(rows, columns, seed):
+    # pye scrolling down one line: set the scroll region, line feed at the bottom
+    # row, draw the new line and update the status line
+    return [
+        "\x1b[1;{}r".format(rows - 1),
+        "\x1b[{};1H".format(rows - 1),
+        "\n",
+        textLines(1, columns, seed)[0],
+        "\x1b[0K",
+        "\x1b[r",
+        "\x1b[{};1H\x1b[1;37;46m".format(rows),
+        "main.py Row: {}/200 Col: 1  ".format(seed + 1),
+        "\x1b[0K\x1b[0m",
+    ]
+
+
+def benchEditor(columns, rows, scale):
+    results = []
+    for name, trace in (
+        ("editorRedraw", editorRedrawTrace),
+        ("editorScroll", editorScrollTrace),
+    ):
+        traces = [trace(rows, columns, seed) for seed in range(8)]
+
+        def setup():
+            display = displayio.Display(columns * 6, rows * 14)
+            return [editorTerminal(display, display.width, display.height), 0]
+
+        def run(state):
+            editor = state[0]
+            for chunk in traces[state[1] % len(traces)]:
+                editor.write(chunk)
+            editor.flush()
+            state[1] += 1
+
+        results.append(measure(name, columns, rows, setup, run, 50 * scale))
+    return results
+
+
+def benchStatus(columns, rows, scale):
+    # setStatus() while typing: only the column number changes
+    def setup():
+        display = displayio.Display(columns * 6, rows * 14)
+        editor = editorTerminal(display, display.width, display.height, targetFPS=1e9)
+        editor.setStatus(chd="", file="main.py", row=12, total=200, col=1, msg="")
+        return [editor, 0]
+
+    def run(state):
+        state[0].setStatus(col=state[1] % columns + 1)
+        state[1] += 1
+
+    return [measure("setStatus", columns, rows, setup, run, 200 * scale)]
+
+
+BENCHMARKS = (
+    benchWrite,
+    benchScroll,
+    benchClearAll,
+    benchLogDump,
+    benchRender,
+    benchEditor,
+    benchStatus,
+)
+
+
+def runAll(scale=1, sizes=GRID_SIZES):
+    results = []
+    for columns, rows in sizes:
+        for benchmark in BENCHMARKS:
+            results.extend(benchmark(columns, rows, scale))
+    return results
+
+
+def resultKey(result):
+    return (
+        result["name"],
+        result["columns"],
+        result["rows"],
+        result.get("ringScroll"),
+    )
+
+
+def compare(results, baseline, tolerance):
+    # returns a list of regression messages
+    previous = {resultKey(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(resultKey(result))
+        if old is None:
+            continue
+        if result["usPerOp"] > old["usPerOp"] * (1 + tolerance):
+            regressions.append(
+                "{} {}x{}: {:.1f}us -> {:.1f}us".format(
+                    result["name"],
+                    result["columns"],
+                    result["rows"],
+                    old["usPerOp"],
+                    result["usPerOp"],
+                )
+            )
+        for counter in ("cellWritesPerOp", "cellReadsPerOp", "refreshesPerOp"):
+            if result[counter] > old.get(counter, result[counter]):
+                regressions.append(
+                    "{} {}x{}: {} {} -> {}".format(
+                        result["name"],
+                        result["columns"],
+                        result["rows"],
+                        counter,
+                        old[counter],
+                        result[counter],
+                    )
+                )
+    return regressions
+
+
+def printTable(results):
+    print(
+        "{:<16} {:>7} {:>5} {:>10} {:>10} {:>9} {:>8} {:>10}".format(
+            "benchmark", "grid", "ring", "us/op", "writes/op", "reads/op", "refr/op", "chars/s"
+        )
+    )
+    for result in results:
+        ringScroll = result.get("ringScroll")
+        charsPerSecond = result.get("charsPerSecond")
+        print(
+            "{:<16} {:>7} {:>5} {:>10.1f} {:>10.1f} {:>9.1f} {:>8.2f} {:>10}".format(
+                result["name"],
+                "{}x{}".format(result["columns"], result["rows"]),
+                "-" if ringScroll is None else ("yes" if ringScroll else "no"),
+                result["usPerOp"],
+                result["cellWritesPerOp"],
+                result["cellReadsPerOp"],
+                result["refreshesPerOp"],
+                "-" if charsPerSecond is None else "{:.0f}".format(charsPerSecond),
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark simpleTerminal and editorTerminal")
+    parser.add_argument("--json", help="save the results to this file")
+    parser.add_argument("--compare", help="compare with results saved by --json")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="allowed slow down before --compare reports a regression (0.5 = 50%%)",
+    )
+    parser.add_argument(
+        "--scale", type=int, default=1, help="repeat each benchmark this many times more"
+    )
+    args = parser.parse_args()
+
+    results = runAll(args.scale)
+    printTable(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#######################
+# memory.py - heap used per terminal instance
+#
+# Creates several terminals of each kind, keeps them alive and reports the heap
+# used per instance.  On CircuitPython the heap is measured with gc.mem_free(), under
+# CPython (with the headless displayio/terminalio stand-in) with tracemalloc.
+# The glyph table and palettes shared by all terminals are created by a first terminal
+# before measuring, so the figures are the cost of each additional terminal.
+#
+# Then it writes 1 KB of text in 64 byte chunks, as str decoded from the bytes (as before
+# write() took bytes), as bytes and as memoryview.  On CircuitPython the garbage collector
+# is turned off and gc.mem_alloc() gives all the bytes allocated during the writes.
+# CPython has no such count: it frees most objects at once, so only the peak above the
+# starting heap is reported, and that is mostly interpreter frames, not the text.
+#
+# How to use:
+#   python benchmarks/memory.py
+#   or copy simpleTerminal.py and this file to the board and import memory
+##############################
+
+import gc
+import sys
+
+if sys.implementation.name != "circuitpython":
+    import os
+
+    _here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(_here, "..", "headless"))
+    sys.path.insert(0, os.path.join(_here, ".."))
+
+import displayio
+from simpleTerminal import simpleTerminal, editorTerminal
+
+try:
+    from gc import mem_free
+
+    def allocated():
+        gc.collect()
+        return -mem_free()
+
+    def allocatedDuring(run):
+        gc.collect()
+        gc.disable()
+        start = gc.mem_alloc()
+        run()
+        used = gc.mem_alloc() - start
+        gc.enable()
+        return used
+
+    ALLOCATED = "bytes allocated per KB"
+
+except ImportError:
+    import tracemalloc
+
+    tracemalloc.start()
+
+    def allocated():
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0]
+
+    def allocatedDuring(run):
+        gc.collect()
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - start
+
+    ALLOCATED = "peak bytes writing 1 KB"
+
+COUNT = 4  # terminals created for each measurement
+
+
+def perInstance(create):
+    create()  # the shared glyph table and palettes
+    keep = []
+    start = allocated()
+    for i in range(COUNT):
+        keep.append(create())
+    return (allocated() - start) // COUNT
+
+
+def editor():
+    display = displayio.Display(240, 240)
+    return editorTerminal(display, 240, 240)
+
+
+MEASUREMENTS = (
+    ("simpleTerminal 40x17", lambda: simpleTerminal(rows=17, columns=40)),
+    (
+        "simpleTerminal 40x17 cursorDisplay=False",
+        lambda: simpleTerminal(rows=17, columns=40, cursorDisplay=False),
+    ),
+    (
+        "simpleTerminal 40x17 ringScroll",
+        lambda: simpleTerminal(rows=17, columns=40, ringScroll=True),
+    ),
+    ("editorTerminal 240x240", editor),
+)
+
+
+CHUNK = 64
+DATA = (
+    "".join("{:4} temperature 21.{}\u00b0C \u2190 ok\r\n".format(i, i % 10) for i in range(40))
+    .encode()[:1024]
+)
+
+
+def writeChunks(write, convert):
+    def run():
+        view = memoryview(DATA)
+        for start in range(0, len(DATA), CHUNK):
+            write(convert(view[start : start + CHUNK]))
+
+    return run
+
+
+INPUTS = (
+    ("str (decoded)", lambda chunk: str(chunk, "utf-8", "ignore")),
+    ("bytes", bytes),
+    ("memoryview", lambda chunk: chunk),
+)
+
+
+def main():
+    for name, create in MEASUREMENTS:
+        print("{:<42} {:>7} bytes".format(name, perInstance(create)))
+    print()
+    for terminalName, create in (
+        ("simpleTerminal", lambda: simpleTerminal(rows=17, columns=40, autoWrap=True)),
+        ("editorTerminal", editor),
+    ):
+        for inputName, convert in INPUTS:
+            terminal = create()
+            run = writeChunks(terminal.write, convert)
+            run()  # warm up
+            print(
+                "{:<42} {:>7} {}".format(
+                    terminalName + " write " + inputName, allocatedDuring(run), ALLOCATED
+                )
+            )
+
+
+main()
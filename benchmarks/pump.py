@@ -0,0 +1,116 @@
+#######################
+# pump.py - feed an editorTerminal from a pipe with terminalPump
+#
+# A writer thread sends a log through os.pipe (or a pty with --pty) in bursts, the main loop
+# pumps the read end into a headless editorTerminal once per frame.  Reports the bytes per
+# second, the lag, the tile writes and refreshes, the tile writes per frame (the scrolls are
+# deferred to the end of the frame, so a frame writes about one screen of tiles however many
+# lines it scrolled) and the final screen.
+#
+# How to use:
+#   python benchmarks/pump.py                 # 200 KB through os.pipe at 30 frames per second
+#   python benchmarks/pump.py --pty --kb 50 --budget 4096
+##############################
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_here, "..", "headless"))
+sys.path.insert(0, os.path.join(_here, ".."))
+
+import displayio  # the headless stand-in
+from simpleTerminal import editorTerminal, terminalPump
+from replay import screenText
+
+
+def logData(kilobytes):
+    lines = []
+    size = 0
+    i = 0
+    while size < kilobytes * 1024:
+        line = "{:6} sensor {} 21.{}°C ← ok\r\n".format(i, i % 7, i % 10)
+        lines.append(line)
+        size += len(line.encode())
+        i += 1
+    return "".join(lines).encode()
+
+
+def writer(fd, data, burst):
+    # send the data in bursts, with a short pause between them
+    for start in range(0, len(data), burst):
+        os.write(fd, data[start : start + burst])
+        time.sleep(0.001)
+    os.close(fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pump a pipe into a headless editorTerminal")
+    parser.add_argument("--kb", type=int, default=200, help="kilobytes to send")
+    parser.add_argument("--fps", type=float, default=30, help="frames per second")
+    parser.add_argument("--budget", type=int, default=2048, help="bytes read per frame")
+    parser.add_argument("--burst", type=int, default=4096, help="bytes sent at once")
+    parser.add_argument("--pty", action="store_true", help="use a pty instead of a pipe")
+    args = parser.parse_args()
+
+    if args.pty:
+        import pty
+        import tty
+
+        readFd, writeFd = pty.openpty()  # read the master, like a terminal emulator
+        tty.setraw(writeFd)
+    else:
+        readFd, writeFd = os.pipe()
+    os.set_blocking(readFd, False)
+    source = open(readFd, "rb", buffering=0)  # readinto returns None when the pipe is empty
+
+    display = displayio.Display(240, 240)
+    editor = editorTerminal(display, 240, 240, targetFPS=args.fps)
+    editor.mainTerminal.autoWrap = True
+    pump = terminalPump(source, editor, budget=args.budget)
+
+    data = logData(args.kb)
+    thread = threading.Thread(target=writer, args=(writeFd, data, args.burst))
+    displayio.resetCounters()
+    pump.reset()
+    thread.start()
+    frame = 1 / args.fps
+    nextFrame = time.monotonic()
+    frameWrites = []  # tile writes of each frame that read something
+    while not pump.eof:
+        before = displayio.counters["cellWrites"]
+        if pump.pump():
+            frameWrites.append(displayio.counters["cellWrites"] - before)
+        nextFrame += frame
+        time.sleep(max(0, nextFrame - time.monotonic()))
+    thread.join()
+
+    print(
+        "{} bytes in {} frames, {:.0f} bytes/s".format(
+            pump.bytesRead, pump.frames, pump.bytesPerSecond()
+        )
+    )
+    print(
+        "{} frames used the whole budget, max lag {:.3f} s".format(
+            pump.fullFrames, pump.maxLag
+        )
+    )
+    print(
+        "tile writes {cellWrites}, refreshes {refreshes}".format(**displayio.counters)
+    )
+    rows, columns = editor.getScreenSize()
+    if frameWrites:
+        print(
+            "tile writes per frame: mean {:.0f}, max {} (the screen is {} tiles)".format(
+                sum(frameWrites) / len(frameWrites), max(frameWrites), rows * columns
+            )
+        )
+    for line in screenText(editor.mainTerminal) + screenText(editor.statusTerminal):
+        print("|" + line + "|")
+
+
+if __name__ == "__main__":
+    main()
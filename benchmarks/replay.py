@@ -0,0 +1,166 @@
+#######################
+# replay.py - replay a terminal trace as fast as possible
+#
+# Feeds a trace recorded with simpleTerminal.terminalRecorder into a headless terminal
+# of the same kind and size, without the pauses between the calls, and reports the total
+# time, a histogram of the time per call for each function, the tile writes and refreshes
+# and the final screen.
+#
+# How to use:
+#   python benchmarks/replay.py trace.txt
+#   python benchmarks/replay.py trace.txt --fps 30     # editorTerminal with targetFPS
+#   python benchmarks/replay.py --sample trace.txt     # record a sample pye-style trace
+##############################
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_here, "..", "headless"))
+sys.path.insert(0, os.path.join(_here, ".."))
+
+import displayio  # the headless stand-in
+import terminalio
+from simpleTerminal import simpleTerminal, editorTerminal, terminalRecorder, glyphTable
+
+
+def readTrace(path):
+    # returns (kind, rows, columns, calls), calls is a list of (name, args, kwargs)
+    calls = []
+    with open(path) as f:
+        kind, rows, columns = f.readline()[1:].split()
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 3:
+                continue
+            kwargs = ast.literal_eval(fields[3]) if len(fields) > 3 else {}
+            calls.append((fields[1], ast.literal_eval(fields[2]), kwargs))
+    return kind, int(rows), int(columns), calls
+
+
+def makeTerminal(kind, rows, columns, fps=None):
+    fontW, fontH = terminalio.FONT.get_bounding_box()
+    if kind == "editorTerminal":
+        display = displayio.Display(columns * fontW, rows * fontH)
+        return editorTerminal(
+            display, display.width, display.height, rows=rows, columns=columns, targetFPS=fps
+        )
+    return simpleTerminal(rows=rows, columns=columns)
+
+
+def replay(terminal, calls):
+    # returns (total seconds, {name: [seconds of each call]})
+    times = {}
+    start = time.perf_counter()
+    for name, args, kwargs in calls:
+        callStart = time.perf_counter()
+        getattr(terminal, name)(*args, **kwargs)
+        times.setdefault(name, []).append(time.perf_counter() - callStart)
+    return time.perf_counter() - start, times
+
+
+def screenText(terminal):
+    # the text shown by a simpleTerminal, "?" for the glyphs that are not ASCII
+    characters = {}
+    for code, tileIndex in enumerate(glyphTable(terminal.font)):
+        if tileIndex is not None and 0x20 <= code <= 0x7E:
+            characters[tileIndex] = chr(code)
+    tiles = terminal._getRows(0, terminal.rows - 1)
+    lines = []
+    for row in range(terminal.rows):
+        line = tiles[row * terminal.columns : (row + 1) * terminal.columns]
+        lines.append("".join(characters.get(tileIndex, "?") for tileIndex in line))
+    return lines
+
+
+BUCKETS = (1, 3, 10, 30, 100, 300, 1000, 3000, 10000)  # histogram limits in microseconds
+
+
+def histogram(seconds):
+    counts = [0] * (len(BUCKETS) + 1)
+    for value in seconds:
+        us = value * 1e6
+        i = 0
+        while i < len(BUCKETS) and us >= BUCKETS[i]:
+            i += 1
+        counts[i] += 1
+    return counts
+
+
+def report(total, times, calls):
+    print("{} calls in {:.1f} ms".format(len(calls), total * 1e3))
+    print(
+        "tile writes {cellWrites}, tile reads {cellReads}, refreshes {refreshes}".format(
+            **displayio.counters
+        )
+    )
+    print()
+    limits = ["<{}".format(limit) for limit in BUCKETS] + [">={}".format(BUCKETS[-1])]
+    print("{:<14} {:>6} {:>9} {:>8} {:>8}  us: {}".format(
+        "function", "calls", "total ms", "mean us", "max us", " ".join(
+            "{:>6}".format(limit) for limit in limits)))
+    for name in sorted(times, key=lambda name: -sum(times[name])):
+        seconds = times[name]
+        print("{:<14} {:>6} {:>9.2f} {:>8.1f} {:>8.1f}      {}".format(
+            name,
+            len(seconds),
+            sum(seconds) * 1e3,
+            sum(seconds) * 1e6 / len(seconds),
+            max(seconds) * 1e6,
+            " ".join("{:>6}".format(count) for count in histogram(seconds)),
+        ))
+
+
+def printScreen(terminal):
+    print()
+    if isinstance(terminal, editorTerminal):
+        lines = screenText(terminal.mainTerminal) + screenText(terminal.statusTerminal)
+    else:
+        lines = screenText(terminal)
+    border = "+" + "-" * len(lines[0]) + "+"
+    print(border)
+    for line in lines:
+        print("|" + line + "|")
+    print(border)
+
+
+def recordSample(path, rows=17, columns=40):
+    # record the pye-style redraw and scroll traces of benchmark.py
+    from benchmark import editorRedrawTrace, editorScrollTrace
+
+    display = displayio.Display(columns * 6, rows * 14)
+    with open(path, "w") as f:
+        editor = terminalRecorder(editorTerminal(display, display.width, display.height), f)
+        for seed in range(20):
+            for chunk in editorRedrawTrace(rows, columns, seed):
+                editor.write(chunk)
+            for chunk in editorScrollTrace(rows, columns, seed):
+                editor.write(chunk)
+            editor.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="replay a terminal trace")
+    parser.add_argument("trace", help="trace file recorded with terminalRecorder")
+    parser.add_argument("--fps", type=float, help="targetFPS for an editorTerminal")
+    parser.add_argument(
+        "--sample", action="store_true", help="record a sample trace to the file instead"
+    )
+    args = parser.parse_args()
+
+    if args.sample:
+        recordSample(args.trace)
+        return
+    kind, rows, columns, calls = readTrace(args.trace)
+    terminal = makeTerminal(kind, rows, columns, args.fps)
+    displayio.resetCounters()
+    total, times = replay(terminal, calls)
+    report(total, times, calls)
+    printScreen(terminal)
+
+
+if __name__ == "__main__":
+    main()
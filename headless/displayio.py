@@ -0,0 +1,154 @@
+#######################
+# displayio.py - headless stand-in for CircuitPython's displayio
+#
+# Put the "headless" directory first on sys.path to run simpleTerminal.py under CPython:
+#
+#   import sys
+#   sys.path.insert(0, "headless")
+#   from simpleTerminal import simpleTerminal
+#
+# Only the parts used by simpleTerminal are provided.  Nothing is drawn, instead every
+# tile read and write and every display refresh is counted in "counters" so the cost
+# of the terminal operations can be measured off-device.
+##############################
+
+counters = {
+    "cellReads": 0,  # TileGrid[x, y] reads
+    "cellWrites": 0,  # TileGrid[x, y] = tile writes
+    "refreshes": 0,  # Display.refresh() calls that updated the display
+}
+
+
+def resetCounters():
+    for key in counters:
+        counters[key] = 0
+
+
+class Bitmap:
+    def __init__(self, width, height, value_count):
+        self.width = width
+        self.height = height
+        self.value_count = value_count
+
+
+class Palette:
+    def __init__(self, color_count):
+        self._colors = [0] * color_count
+        self._transparent = [False] * color_count
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def __setitem__(self, index, color):
+        self._colors[index] = color
+
+    def make_transparent(self, index):
+        self._transparent[index] = True
+
+    def make_opaque(self, index):
+        self._transparent[index] = False
+
+
+class TileGrid:
+    def __init__(
+        self,
+        bitmap,
+        *,
+        pixel_shader,
+        width=1,
+        height=1,
+        tile_width=None,
+        tile_height=None,
+        default_tile=0,
+        x=0,
+        y=0
+    ):
+        self.bitmap = bitmap
+        self.pixel_shader = pixel_shader
+        self.width = width
+        self.height = height
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self.tiles = bytearray([default_tile]) * (width * height)
+
+    def _index(self, index):
+        if isinstance(index, tuple):
+            x, y = index
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise IndexError("Tile index out of bounds")
+            return y * self.width + x
+        if not (0 <= index < self.width * self.height):
+            raise IndexError("Tile index out of bounds")
+        return index
+
+    def __getitem__(self, index):
+        counters["cellReads"] += 1
+        return self.tiles[self._index(index)]
+
+    def __setitem__(self, index, tile):
+        counters["cellWrites"] += 1
+        self.tiles[self._index(index)] = tile
+
+
+class Group:
+    def __init__(self, *, max_size=4, scale=1, x=0, y=0):
+        self.max_size = max_size
+        self.scale = scale
+        self.x = x
+        self.y = y
+        self.hidden = False
+        self._layers = []
+
+    def _check(self):
+        if len(self._layers) >= self.max_size:
+            raise RuntimeError("Group full")
+
+    def append(self, layer):
+        self._check()
+        self._layers.append(layer)
+
+    def insert(self, index, layer):
+        self._check()
+        self._layers.insert(index, layer)
+
+    def index(self, layer):
+        return self._layers.index(layer)
+
+    def pop(self, i=-1):
+        return self._layers.pop(i)
+
+    def remove(self, layer):
+        self._layers.remove(layer)
+
+    def __len__(self):
+        return len(self._layers)
+
+    def __getitem__(self, index):
+        return self._layers[index]
+
+    def __setitem__(self, index, layer):
+        self._layers[index] = layer
+
+    def __delitem__(self, index):
+        del self._layers[index]
+
+
+class Display:
+    def __init__(self, width=240, height=240):
+        self.width = width
+        self.height = height
+        self.auto_refresh = True
+        self.root_group = None
+
+    def show(self, group):
+        self.root_group = group
+
+    def refresh(self, *, target_frames_per_second=60, minimum_frames_per_second=1):
+        counters["refreshes"] += 1
+        return True
@@ -0,0 +1,50 @@
+#######################
+# terminalio.py - headless stand-in for CircuitPython's terminalio
+#
+# Provides a fixed-size FONT with the same interface as the built in font
+# (bitmap, get_bounding_box() and get_glyph()), see headless/displayio.py
+##############################
+
+import displayio
+
+
+class Glyph:
+    def __init__(self, bitmap, tile_index, width, height):
+        self.bitmap = bitmap
+        self.tile_index = tile_index
+        self.width = width
+        self.height = height
+        self.dx = 0
+        self.dy = 0
+        self.shift_x = width
+        self.shift_y = 0
+
+
+class BuiltinFont:
+    # 6x14 pixel cells, 40x17 characters on a 240x240 display.
+    # Printable ASCII uses tiles 0..94, followed by a few extra characters.
+    extraCharacters = "°±²³µ·×÷éü←↑→↓█"
+
+    def __init__(self, width=6, height=14):
+        self._width = width
+        self._height = height
+        self._tiles = {}
+        for code in range(0x20, 0x7F):
+            self._tiles[code] = code - 0x20
+        for i, char in enumerate(self.extraCharacters):
+            self._tiles[ord(char)] = 0x7F - 0x20 + i
+        self.bitmap = displayio.Bitmap(
+            width * len(self._tiles), height, 2
+        )  # one row of tiles
+
+    def get_bounding_box(self):
+        return (self._width, self._height)
+
+    def get_glyph(self, codepoint):
+        tile = self._tiles.get(codepoint)
+        if tile is None:
+            return None
+        return Glyph(self.bitmap, tile, self._width, self._height)
+
+
+FONT = BuiltinFont()
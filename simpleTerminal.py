@@ -47,21 +47,152 @@
 # To Do:
 # Maybe the class should take the display as an input
 #
-# Add highlighted text
-# My current thoughts on how to achieve.
-# Make three text layers.
-# Bottom layer has black background and white letters and displays all the text
-# Middle layer has two items in the bitmap, one transparent square and one "highlight" color square.
-#   - This has "highlight" entries in the tilegrid only for the highlighted text.
-# Top layer has clear background and black text.  It only contains text entries in the tilegrid for highlighted text
-#    - (same as the middle layer).
+# Highlighted text:
+# Instead of three full size text layers, the attributes are kept as run length spans
+# for each row.  Each span is drawn by a small overlay tilegrid, the size of the span,
+# that shows the same glyphs with the highlight palette.  See setAttribute().
 
 
+import errno
+import time
 import displayio
 import terminalio
 
 
+_glyphTables = {}  # glyph lookup tables shared by all terminals, one per font
+
+
+def glyphTable(font):
+    # Returns a 128-entry list from code point to tile index for the font (None where the
+    # font has no glyph).  The table is built once per font and shared across terminals.
+    table = _glyphTables.get(font)
+    if table is None:
+        table = []
+        for code in range(128):
+            glyph = font.get_glyph(code)
+            table.append(None if glyph is None else glyph.tile_index)
+        _glyphTables[font] = table
+    return table
+
+
+_palettes = {}  # two color palettes shared by all terminals, one per (background, text) pair
+
+
+def colorPalette(bgColor, textColor):
+    # returns the shared palette with entry 0 set to bgColor and entry 1 to textColor
+    palette = _palettes.get((bgColor, textColor))
+    if palette is None:
+        palette = displayio.Palette(2)
+        palette[0] = bgColor
+        palette[1] = textColor
+        _palettes[(bgColor, textColor)] = palette
+    return palette
+
+
+# Instrumentation
+#
+# Create a statsSimpleTerminal or statsEditorTerminal (see the end of this file) with a
+# terminalStats() as stats= to count tile writes, glyph lookups, scrolls, cursor moves and
+# refreshes, and to accumulate the time spent in each operation.  The instrumented classes
+# wrap the operations with the timing, the tile grid rows and the glyph table are wrapped with
+# counters when the terminal is created with stats.  simpleTerminal and editorTerminal with
+# stats=None (the default) time and count nothing, so the instrumentation can stay in release
+# builds.  The instrumented class is chosen by the caller, not by __new__, and no builtin type
+# is subclassed, so this also works on CircuitPython and MicroPython.
+
+try:
+    from time import monotonic_ns as _ticks  # integer nanoseconds, no float rounding
+
+    _TICK_SECONDS = 1e-9
+except ImportError:
+    from time import monotonic as _ticks
+
+    _TICK_SECONDS = 1
+
+
+class terminalStats:
+    __slots__ = ("counts", "ticks")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # counts["tileWrites"], counts["glyphLookups"], counts["refreshes"] and the number of
+        # calls of each timed operation, ticks holds the time of each timed operation
+        self.counts = {"tileWrites": 0, "glyphLookups": 0, "refreshes": 0}
+        self.ticks = {}
+
+    def add(self, name, ticks):
+        # one call of the operation name that took ticks
+        self.counts[name] = self.counts.get(name, 0) + 1
+        self.ticks[name] = self.ticks.get(name, 0) + ticks
+
+    def snapshot(self):
+        # returns (counts, seconds): copies of the counts and of the seconds per operation
+        seconds = {}
+        for name in self.ticks:
+            seconds[name] = self.ticks[name] * _TICK_SECONDS
+        return dict(self.counts), seconds
+
+
+class _countingTileGrid:
+    # stands in for a tilegrid in gridRows and counts the tile writes
+    __slots__ = ("tilegrid", "counts")
+
+    def __init__(self, tilegrid, stats):
+        self.tilegrid = tilegrid
+        self.counts = stats.counts
+
+    def __setitem__(self, index, tileIndex):
+        self.counts["tileWrites"] += 1
+        self.tilegrid[index] = tileIndex
+
+    def __getitem__(self, index):
+        return self.tilegrid[index]
+
+
+class _countingGlyphs:
+    # stands in for the glyph table and counts the lookups
+    __slots__ = ("table", "counts")
+
+    def __init__(self, table, stats):
+        self.table = table
+        self.counts = stats.counts
+
+    def __getitem__(self, code):
+        self.counts["glyphLookups"] += 1
+        return self.table[code]
+
+
+def _timed(name, method):
+    # wrap method to add its time to self.stats as operation name
+    def timedMethod(self, *args, **kwargs):
+        start = _ticks()
+        result = method(self, *args, **kwargs)
+        self.stats.add(name, _ticks() - start)
+        return result
+
+    return timedMethod
+
+
 class simpleTerminal:
+    # the instance variables, __slots__ saves the per-instance dictionary
+    __slots__ = (
+        "rows", "columns", "font", "bgColor", "textColor", "xPixels", "yPixels",
+        "cursorX", "cursorY", "cursorDisplay", "cursorWhileScrolling", "ringScroll",
+        "autoWrap", "stats", "cursorStatus", "blinkPeriod", "blinkInverted", "nextBlink",
+        "outputCount", "cursorMoves", "blinkActivity", "renderedLines", "renderedCount",
+        "utf8Code", "utf8Remaining",
+        "fontW", "fontH", "pixelWidth", "pixelHeight", "glyphs", "blankGlyph", "blankRow",
+        "buffer", "topRow", "deferred", "deferDepth", "snapshot", "snapshotTopRow", "dirtyRows", "dirty",
+        "scrollTop", "scrollBottom", "scrollback", "history", "historyHead", "historyCount",
+        "viewOffset", "viewCursor", "attribute", "spans", "maxHighlights", "pendingSpans",
+        "overlayGroup",
+        "palette", "tilegrid", "rowTileGrids", "textGroup", "gridRows",
+        "bgHighlightColor", "textHighlightColor", "cursorpalette", "cursortilegrid",
+        "displayGroup",
+    )
+
     def __init__(
         self,
         rows,
@@ -75,6 +206,12 @@ class simpleTerminal:
         cursorY=0, # initial row position of the cursor
         cursorDisplay=True,
         cursorWhileScrolling=False,
+        ringScroll=False, # if True, use one tilegrid per row and scroll by moving the rows
+        scrollback=0, # number of lines that scrolled off the top to keep for paging back
+        maxHighlights=8, # maximum number of highlighted spans shown at once, the others wait
+        autoWrap=False, # if True, wrap text at the right edge and scroll at the bottom row
+        stats=None, # a terminalStats to count the tile writes and glyph lookups, see statsSimpleTerminal
+        blinkPeriod=None, # seconds between cursor blinks driven by blinkTick(), None for no blinking
     ):
 
         # Define the instance variables
@@ -93,11 +230,32 @@ class simpleTerminal:
         self.cursorWhileScrolling = (
             cursorWhileScrolling
         )  # if True, keep cursor highlighted while scrolling
+        self.ringScroll = ringScroll
+        self.autoWrap = autoWrap
+        self.stats = stats
 
         self.cursorStatus = (
             False
         )  # For cursor blinking, this shows when the cursor status is "on"
 
+        # Cursor blinking, see blinkTick().  outputCount counts the calls that change the text
+        # and cursorMoves the setCursor() calls, the blinking pauses while either keeps changing.
+        self.blinkPeriod = blinkPeriod
+        self.blinkInverted = False  # True while the cursor colors are swapped
+        self.nextBlink = 0
+        self.outputCount = 0
+        self.cursorMoves = 0
+        self.blinkActivity = 0  # outputCount + cursorMoves at the last blinkTick()
+
+        # UTF-8 decoder state for bytes input, kept between writes so that a character
+        # can be split across writes: the bits so far and the number of bytes still to come
+        self.utf8Code = 0
+        self.utf8Remaining = 0
+
+        # The text of each row from the last render(), valid while outputCount is renderedCount
+        self.renderedLines = None
+        self.renderedCount = 0
+
         self.fontW, self.fontH = self.font.get_bounding_box()
 
         # Calculate the pixel dimensions for the terminal window
@@ -108,46 +266,130 @@ class simpleTerminal:
             self.fontH * self.rows
         )  # the pixel height of the terminal window (in units of pixels)
 
-        self.blankGlyph = self.font.get_glyph(
-            ord(" ")
-        ).tile_index  # this is the font glyph for a blank space
+        # code point to tile index lookup for ASCII, shared with other terminals using this font
+        self.glyphs = glyphTable(self.font)
+        if stats is not None:
+            self.glyphs = _countingGlyphs(self.glyphs, stats)
+        self.blankGlyph = self.glyphs[0x20]  # this is the font glyph for a blank space
         # do we need to be sure that no one changes the font after creating the instance?
 
-        self.palette = displayio.Palette(2)
-        self.palette[0] = bgColor
-        self.palette[1] = textColor
-
-        self.tilegrid = displayio.TileGrid(
-            bitmap=self.font.bitmap,
-            pixel_shader=self.palette,
-            x=self.xPixels,
-            y=self.yPixels,
-            width=self.columns,
-            height=self.rows,
-            tile_width=self.fontW,
-            tile_height=self.fontH,
-        )
+        # Shadow buffer of tile indices, one byte per cell, stored row by row.
+        # This is the source of truth for the terminal contents, the tilegrid is
+        # only written when a cell actually changes and is never read back.
+        # The buffer rows are "physical" rows, the logical row 0 (top of the terminal) is
+        # stored at physical row topRow.  topRow only moves in ringScroll mode.
+        self.blankRow = bytes([self.blankGlyph]) * self.columns
+        self.buffer = bytearray(self.blankRow * self.rows)
+        self.topRow = 0
+
+        # While deferred, changes only go to the shadow buffer, they are sent to the tilegrid
+        # by comparing with the snapshot of the buffer when the deferred update ends.
+        # deferDepth counts the beginDeferred() calls that hold the update over several calls.
+        self.deferred = False
+        self.deferDepth = 0
+        self.snapshot = None
+        self.snapshotTopRow = 0
+
+        # Rows (logical) that changed since the last clearDirty(), used to coalesce display refreshes
+        self.dirtyRows = bytearray(self.rows)
+        self.dirty = False
+
+        # scroll region (DECSTBM), scrolling only moves the rows scrollTop..scrollBottom (inclusive)
+        self.scrollTop = 0
+        self.scrollBottom = self.rows - 1
+
+        # Scrollback history: a ring of fixed-width rows of tile indices, historyHead is the
+        # next row to write.  Lines are saved when they scroll off the top of the terminal.
+        self.scrollback = scrollback
+        self.history = bytearray(scrollback * self.columns)
+        self.historyHead = 0
+        self.historyCount = 0
+        self.viewOffset = 0  # number of history lines shown above the live terminal
+        self.viewCursor = False  # cursor status before paging back
+
+        # Text attributes (highlighting), stored as run length spans per logical row.
+        # attribute is None for normal text, or a (textColor, bgColor) pair.
+        # Each span is [start column, end column, attribute, overlay tilegrid].  The overlay is a
+        # one row tilegrid the size of the span that shows the same glyphs with the span's colors.
+        self.attribute = None
+        self.spans = [[] for row in range(self.rows)]
+        # At most maxHighlights spans have an overlay, the other spans wait for a free overlay
+        # and pendingSpans counts them.
+        self.maxHighlights = maxHighlights
+        self.pendingSpans = 0
+        self.overlayGroup = None  # created when the first span is shown
+
+        self.palette = colorPalette(bgColor, textColor)  # shared with other terminals
+
+        if self.ringScroll:
+            # ring scrolling: one tilegrid per row, a scroll only blanks the exposed rows
+            # and moves the rows' y-position.  self.tilegrid is not used in this mode.
+            self.tilegrid = None
+            self.rowTileGrids = []
+            self.textGroup = displayio.Group(max_size=self.rows, scale=1)
+            for row in range(self.rows):
+                rowTileGrid = displayio.TileGrid(
+                    bitmap=self.font.bitmap,
+                    pixel_shader=self.palette,
+                    x=self.xPixels,
+                    y=self.yPixels + row * self.fontH,
+                    width=self.columns,
+                    height=1,
+                    tile_width=self.fontW,
+                    tile_height=self.fontH,
+                    default_tile=self.blankGlyph,
+                )
+                self.rowTileGrids.append(rowTileGrid)
+                self.textGroup.append(rowTileGrid)
+            # (tilegrid, tilegrid row) that displays each physical row of the buffer
+            self.gridRows = [(rowTileGrid, 0) for rowTileGrid in self.rowTileGrids]
+        else:
+            self.tilegrid = displayio.TileGrid(
+                bitmap=self.font.bitmap,
+                pixel_shader=self.palette,
+                x=self.xPixels,
+                y=self.yPixels,
+                width=self.columns,
+                height=self.rows,
+                tile_width=self.fontW,
+                tile_height=self.fontH,
+                default_tile=self.blankGlyph,  # start out matching the shadow buffer
+            )
+            self.rowTileGrids = None
+            self.textGroup = self.tilegrid
+            self.gridRows = [(self.tilegrid, row) for row in range(self.rows)]
+        if stats is not None:
+            self.gridRows = [
+                (_countingTileGrid(tilegrid, stats), gridRow)
+                for tilegrid, gridRow in self.gridRows
+            ]
 
         # highlight color for the cursor is the swap of the standard colors
         self.bgHighlightColor = self.textColor  # Swap the colors as default
         self.textHighlightColor = self.bgColor  # Swap the colors as default
 
-        self.cursorpalette = displayio.Palette(2)
-        self.cursorColorReset()
-
-        self.cursortilegrid = displayio.TileGrid(
-            bitmap=self.font.bitmap,
-            pixel_shader=self.cursorpalette,
-            x=self.xPixels,
-            y=self.yPixels,
-            width=1,
-            height=1,
-            tile_width=self.fontW,
-            tile_height=self.fontH,
-        )
+        # The cursor has its own palette since blinking changes it.  The cursor palette and
+        # tilegrid are only created if the cursor can be displayed.
+        if self.cursorDisplay:
+            self.cursorpalette = displayio.Palette(2)
+            self.cursorColorReset()
+
+            self.cursortilegrid = displayio.TileGrid(
+                bitmap=self.font.bitmap,
+                pixel_shader=self.cursorpalette,
+                x=self.xPixels,
+                y=self.yPixels,
+                width=1,
+                height=1,
+                tile_width=self.fontW,
+                tile_height=self.fontH,
+            )
+        else:
+            self.cursorpalette = None
+            self.cursortilegrid = None
 
-        self.displayGroup = displayio.Group(max_size=2, scale=1, x=0, y=0)
-        self.displayGroup.append(self.tilegrid)  ### temporarily commented for debug!!!!!  ****
+        self.displayGroup = displayio.Group(max_size=3, scale=1, x=0, y=0)
+        self.displayGroup.append(self.textGroup)
         if self.cursorDisplay:
             self.cursorOn()  # if the cursor is to be displayed, then add it to the group.
 
@@ -160,34 +402,125 @@ class simpleTerminal:
         # self.cursorX = self.clamp(column, 0, self.columns - 1)  # if you want to constrain
         # self.cursorY = self.clamp(row, 0, self.rows - 1)# if you want to constrain
         # print( "cursorX: {}, cursorY: {}".format(self.cursorX, self.cursorY) )  # for debug
+        self._markCursorDirty()
+        self.cursorMoves += 1
         self.cursorX = column
         self.cursorY = row
 
         # this sets the cursor tile grid position to the right location on the display
-        self.cursortilegrid.x = self.cursorX * self.fontW
-        self.cursortilegrid.y = self.cursorY * self.fontH
-        self.writeCursorChar()
+        if self.cursortilegrid is not None:
+            self.cursortilegrid.x = self.cursorX * self.fontW
+            self.cursortilegrid.y = self.cursorY * self.fontH
+            if not self.deferred:  # otherwise done once by _flushDeferred
+                self.writeCursorChar()
+            self._markCursorDirty()
+
+    def _markCursorDirty(self):
+        # the cursor row needs a refresh if the cursor is showing
+        if self.cursorStatus and (0 <= self.cursorY < self.rows):
+            self.dirtyRows[self.cursorY] = 1
+            self.dirty = True
+
+    def clearDirty(self):
+        # call after the display is refreshed
+        for row in range(self.rows):
+            self.dirtyRows[row] = 0
+        self.dirty = False
+
+    def _markAllDirty(self):
+        # every row needs a refresh, for example after the rows moved
+        for row in range(self.rows):
+            self.dirtyRows[row] = 1
+        self.dirty = True
+
+    def dirtyRects(self):
+        # Returns the areas that changed since clearDirty() as a list of pixel rectangles
+        # (x, y, width, height) in the coordinates of the parent of displayGroup, one for each
+        # run of changed rows.  For a display driver that can refresh part of the screen.
+        rects = []
+        x = self.displayGroup.x + self.xPixels
+        y = self.displayGroup.y + self.yPixels
+        row = 0
+        while row < self.rows:
+            if self.dirtyRows[row]:
+                top = row
+                while row < self.rows and self.dirtyRows[row]:
+                    row += 1
+                rects.append(
+                    (x, y + top * self.fontH, self.pixelWidth, (row - top) * self.fontH)
+                )
+            row += 1
+        return rects
 
     def writeCursorChar(self):
         # This ensures that the cursor shows the same character as the main terminal
 
         # ensure that the cursor is in the terminal boundaries
-        if (0 <= self.cursorX < self.columns) and (0 <= self.cursorY < self.rows):
-            self.cursortilegrid[0, 0] = self.tilegrid[self.cursorX, self.cursorY]
+        if (
+            (0 <= self.cursorX < self.columns)
+            and (0 <= self.cursorY < self.rows)
+            and self.cursortilegrid is not None
+        ):
+            self.cursortilegrid[0, 0] = self.buffer[
+                self._rowOffset(self.cursorY) + self.cursorX
+            ]
 
     def cursorColorReset(self):
         # sets the color back to the original values, useful when cursorColorChange is used and last color is uncertain
+        if self.cursorpalette is None:
+            return
         self.cursorpalette[0] = self.bgHighlightColor
         self.cursorpalette[1] = self.textHighlightColor
+        self.blinkInverted = False
 
     def cursorColorChange(self):  # alternates the color of the cursor
+        # only the palette entries are swapped, the tilegrid keeps using the same palette
+        if self.cursorpalette is None:
+            return
         tempColor = self.cursorpalette[0]
         self.cursorpalette[0] = self.cursorpalette[1]
         self.cursorpalette[1] = tempColor
-        self.cursortilegrid.pixel_shader = self.cursorpalette
+        self.blinkInverted = not self.blinkInverted
+        self._markCursorDirty()
+
+    def blinkTick(self, now=None):
+        # Blink the cursor: swap the cursor colors if blinkPeriod has passed since the last blink.
+        # Call this often, from the main loop or from blinkTask().  Nothing is done when blinking
+        # is off or the cursor is hidden.  While the text keeps changing or the cursor keeps
+        # moving the cursor is shown solid, and the blinking starts again blinkPeriod after that stops.
+        # Returns True if the cursor colors changed.
+        if self.blinkPeriod is None or not self.cursorStatus:
+            return False
+        if now is None:
+            now = time.monotonic()
+        activity = self.outputCount + self.cursorMoves
+        if activity != self.blinkActivity:  # output or cursor moves since the last tick
+            self.blinkActivity = activity
+            self.nextBlink = now + self.blinkPeriod
+            if self.blinkInverted:
+                self.cursorColorChange()
+                return True
+            return False
+        if now < self.nextBlink:
+            return False
+        self.cursorColorChange()
+        self.nextBlink = now + self.blinkPeriod
+        return True
+
+    async def blinkTask(self):
+        # asyncio task that blinks the cursor, for example asyncio.create_task(terminal.blinkTask())
+        import asyncio
+
+        while True:
+            self.blinkTick()
+            delay = self.nextBlink - time.monotonic()
+            if delay <= 0:  # the cursor is hidden or blinking is off, check again later
+                delay = self.blinkPeriod or 0.5
+            await asyncio.sleep(delay)
 
     def cursorOff(self):  # to turn the cursor off, such as during scrolling
         if self.cursorDisplay and self.cursorStatus:
+            self._markCursorDirty()
             self.displayGroup.pop(i=-1)
             self.cursorStatus = False
 
@@ -195,96 +528,906 @@ class simpleTerminal:
         if self.cursorDisplay and self.cursorStatus == False:
             self.displayGroup.append(self.cursortilegrid)
             self.cursorStatus = True
+            self._markCursorDirty()
             # writeCursorChar()
 
+    def tileIndex(self, code):
+        # returns the tile index for a code point, or None if the font has no glyph for it
+        if code < 128:
+            return self.glyphs[code]
+        thisGlyph = self.font.get_glyph(code)
+        if thisGlyph is None:
+            return None
+        return thisGlyph.tile_index
+
     def writeChar(self, char):
+        self._writeTile(self.tileIndex(ord(char)))
+
+    def _writeTile(self, tileIndex):
         # if the cursor is out of the terminal boundaries, do nothing
         if (0 <= self.cursorX < self.columns) and (0 <= self.cursorY < self.rows):
-            thisGlyph = self.font.get_glyph(
-                ord(char)
-            )  # get the glyph for the character
-            # print("{} x: {} y: {} glyph: {}".format(char,self.cursorX, self.cursorY, thisGlyph.tile_index) ) # for debug
-
             # update the tile at the current cursor position
-            if thisGlyph.tile_index != None:  # verify that a glyph was returned
-                self.tilegrid[self.cursorX, self.cursorY] = thisGlyph.tile_index
+            if tileIndex is not None:  # verify that the font has a glyph
+                self.outputCount += 1
+                self._setTile(self.cursorX, self.cursorY, tileIndex)
+                self._attributeRun(self.cursorY, self.cursorX, self.cursorX + 1)
                 self.setCursor(self.cursorX + 1, self.cursorY)
 
     def write(
         self, text
     ):  # based on: circuitpython/shared-module/terminalio/Terminal.c from github
-        for char in text:
-            if ord(char) < 128:
-                if (ord(char) >= 0x20) and (ord(char) <= 0x7E):
-                    self.writeChar(char)
-
-                # Some of the VT100 code is missing here from Terminal.c ****
-                # Add carriage return \r
-                elif char == "\r":
-                    self.setCursor(0, self.cursorY)
-                # Add newline \n
-                elif char == "\n":
-                    self.setCursor(self.cursorX, self.cursorY + 1)
-
-                # Add backspace \b
-                elif char == "\b":
-                    self.setCursor(self.cursorX - 1, self.cursorY)
-                    # this should also write a space at the current location
-                    self.writeBlank(self.cursorX, self.cursorY)
-                    #self.setCursor(self.cursorX - 1, self.cursorY)  #*****
+        # The cursor position is tracked locally while writing and the cursor tile is
+        # only moved once, at the end of the text.
+        # text can be a str, or UTF-8 bytes, bytearray or memoryview that are decoded as
+        # they are written, without making a str.
+        if isinstance(text, str):
+            codes = map(ord, text)
+            decode = False
+        else:
+            codes = text  # iterating bytes gives the byte values
+            decode = True
+        glyphs = self.glyphs
+        columns = self.columns
+        rows = self.rows
+        # With autoWrap, the text wraps at the right edge and a new line at the bottom of
+        # the scroll region scrolls.  The scrolls are only done in the shadow buffer and the
+        # tilegrid is updated once at the end, so a long output costs one screen of tile writes.
+        self.outputCount += 1
+        cursorX = self.cursorX
+        cursorY = self.cursorY
+        runStart = cursorX  # start of the text written on this row, for the attributes
+        moved = False
+        pending = self.utf8Remaining  # a UTF-8 character is not complete yet
+        for code in codes:
+            if code < 128:
+                if pending:  # an ASCII byte ends the character in progress
+                    self.utf8Remaining = 0
+                    pending = 0
+                if 0x20 <= code <= 0x7E:
+                    tileIndex = glyphs[code]
+                    # fall through to write the tile
+                else:
+                    self._attributeRun(cursorY, runStart, cursorX)
+                    # Some of the VT100 code is missing here from Terminal.c ****
+                    # Add carriage return \r
+                    if code == 0x0D:
+                        cursorX = 0
+                        moved = True
+                    # Add newline \n
+                    elif code == 0x0A:
+                        if not self.autoWrap:
+                            cursorY = cursorY + 1
+                        elif cursorY == self.scrollBottom:
+                            self._deferredScroll(-1)
+                        elif cursorY < rows - 1:
+                            cursorY = cursorY + 1
+                        moved = True
+                    # Add backspace \b
+                    elif code == 0x08:
+                        cursorX = cursorX - 1
+                        moved = True
+                        # this should also write a space at the current location
+                        self.writeBlank(cursorX, cursorY)
+                    runStart = cursorX
+                    continue
+            else:
+                if decode:
+                    code = self._decodeUTF8(code)
+                    pending = self.utf8Remaining
+                    if code < 0:
+                        continue  # the character is not complete yet
+                elif pending:  # so does a character of a str
+                    self.utf8Remaining = 0
+                    pending = 0
+                tileIndex = self.tileIndex(code)
+
+            if (
+                cursorX >= columns
+                and self.autoWrap
+                and (0 <= cursorY < rows)
+                and tileIndex is not None
+            ):  # wrap to the start of the next line
+                self._attributeRun(cursorY, runStart, cursorX)
+                cursorX = 0
+                runStart = 0
+                if cursorY == self.scrollBottom:
+                    self._deferredScroll(-1)
+                elif cursorY < rows - 1:
+                    cursorY = cursorY + 1
+
+            # if the cursor is out of the terminal boundaries, do nothing
+            if (0 <= cursorX < columns) and (0 <= cursorY < rows):
+                if tileIndex is not None:  # verify that the font has a glyph
+                    self._setTile(cursorX, cursorY, tileIndex)
+                    cursorX = cursorX + 1
+                    moved = True
+
+        self._attributeRun(cursorY, runStart, cursorX)
+        if moved:
+            self.setCursor(cursorX, cursorY)
+        if self.deferred and not self.deferDepth:
+            self._flushDeferred()
+
+    def _decodeUTF8(self, byte):
+        # Feed one byte (0x80 or more) of UTF-8, returns the code point when a character is
+        # complete and -1 otherwise.  Bytes that do not fit the UTF-8 encoding are skipped and
+        # drop the character in progress, the caller resets utf8Remaining on an ASCII byte.
+        if byte >= 0xC0:  # the first byte of a character
+            if byte >= 0xF8 or byte <= 0xC1:  # not used in UTF-8
+                self.utf8Remaining = 0
+            elif byte >= 0xF0:
+                self.utf8Code = byte & 0x07
+                self.utf8Remaining = 3
+            elif byte >= 0xE0:
+                self.utf8Code = byte & 0x0F
+                self.utf8Remaining = 2
+            else:
+                self.utf8Code = byte & 0x1F
+                self.utf8Remaining = 1
+            return -1
+        if self.utf8Remaining == 0:
+            return -1  # a continuation byte without a first byte
+        self.utf8Code = (self.utf8Code << 6) | (byte & 0x3F)
+        self.utf8Remaining -= 1
+        if self.utf8Remaining or self.utf8Code < 0x80:
+            return -1  # not complete yet, or an ASCII character in more than one byte
+        return self.utf8Code
+
+    def beginDeferred(self):
+        # Hold the scrolls done by new lines (write() with autoWrap, lineFeed and reverseIndex)
+        # in the shadow buffer until endDeferred(), then send the cells that changed to the
+        # tilegrid once, so any number of scrolls costs at most one screen of tile writes.
+        # The calls can be nested, for example around several writes.
+        self.deferDepth += 1
+
+    def endDeferred(self):
+        self.deferDepth -= 1
+        if self.deferDepth == 0 and self.deferred:
+            self._flushDeferred()
+
+    def _deferredScroll(self, count):
+        # scroll the scroll region down by count rows (up if count is negative) in the shadow
+        # buffer only, see _flushDeferred
+        if not self.deferred:
+            if self.viewOffset:
+                self.setViewOffset(0)
+            self.snapshot = bytes(self.buffer)
+            self.snapshotTopRow = self.topRow
+            self.deferred = True
+        if count < 0 and self.scrollTop == 0:
+            self._saveHistory(min(-count, self.scrollBottom + 1))
+        self._moveRows(self.scrollTop, self.scrollBottom, count)
+
+    def _flushDeferred(self):
+        # send the cells that differ from the snapshot to the tilegrid
+        self.deferred = False
+        snapshot = self.snapshot
+        self.snapshot = None
+        buffer = self.buffer
+        columns = self.columns
+        for physicalRow in range(self.rows):
+            start = physicalRow * columns
+            if buffer[start : start + columns] != snapshot[start : start + columns]:
+                tilegrid, gridRow = self.gridRows[physicalRow]
+                for column in range(columns):
+                    if buffer[start + column] != snapshot[start + column]:
+                        tilegrid[column, gridRow] = buffer[start + column]
+        if self.topRow != self.snapshotTopRow:
+            self._placeRows()
+        self._markAllDirty()  # the text scrolled
+        self.writeCursorChar()
 
+    def writeLine(self, row, text, start=0, clearRest=True):
+        # Writes text on row starting at column start, and blanks the rest of the row if clearRest.
+        # The text is translated to tile indices in one pass and only the cells that change are
+        # written.  Control characters and characters without a glyph are skipped, text past the
+        # end of the row is dropped.  The cursor does not move.
+        # Returns the column after the text.
+        if not ((0 <= row < self.rows) and (0 <= start < self.columns)):
+            return start
+        self.outputCount += 1
+        tiles = self._textTiles(text, self.columns - start)
+        end = start + len(tiles)
+        if clearRest:
+            tiles += self.blankRow[end:]  # blank the rest of the row in the same pass
+        self._putTiles(start, row, tiles)
+        self._attributeRun(row, start, end)
+        if clearRest and self.spans[row]:
+            self._setSpan(row, end, self.columns, None)
+        return end
+
+    def writeAt(self, column, row, text):
+        # Writes text at column, row without moving the cursor, see writeLine
+        return self.writeLine(row, text, column, False)
+
+    def render(self, lines):
+        # Draws a whole frame, lines[row] is the text of each row (missing rows are blank).
+        # The rows are drawn as plain text and the cursor does not move.  A row with the same
+        # text as in the last render() is skipped without translating it, if nothing else
+        # changed the terminal in between.  Other rows are compared with the shadow buffer
+        # row first and only the cells that differ are written.
+        # Returns the number of rows that changed.
+        columns = self.columns
+        if self.renderedCount == self.outputCount:
+            previous = self.renderedLines
+        else:
+            previous = None
+        self.outputCount += 1
+        rendered = []
+        changed = 0
+        for row in range(self.rows):
+            line = lines[row] if row < len(lines) else ""
+            rendered.append(line)
+            if previous is not None and previous[row] == line:
+                continue
+            tiles = self._textTiles(line, columns)
+            tiles += self.blankRow[len(tiles) :]
+            start = self._rowOffset(row)
+            if self.buffer[start : start + columns] != tiles:
+                self._putTiles(0, row, tiles)
+                changed += 1
+            if self.spans[row]:
+                self._setSpan(row, 0, columns, None)
+        self.renderedLines = rendered
+        self.renderedCount = self.outputCount
+        return changed
+
+    def _textTiles(self, text, length):
+        # translate up to length printable characters of text into a bytearray of tile indices,
+        # text can be a str or UTF-8 bytes, bytearray or memoryview (see write)
+        glyphs = self.glyphs
+        tiles = bytearray()
+        if isinstance(text, str):
+            codes = map(ord, text)
+            decode = False
+        else:
+            codes = text
+            decode = True
+        pending = self.utf8Remaining
+        for code in codes:
+            if code < 128:
+                if pending:  # an ASCII byte ends the character in progress
+                    self.utf8Remaining = 0
+                    pending = 0
+                if not (0x20 <= code <= 0x7E):
+                    continue
+                tileIndex = glyphs[code]
             else:
-                self.writeChar(char)
+                if decode:
+                    code = self._decodeUTF8(code)
+                    pending = self.utf8Remaining
+                    if code < 0:
+                        continue
+                elif pending:
+                    self.utf8Remaining = 0
+                    pending = 0
+                tileIndex = self.tileIndex(code)
+            if tileIndex is not None:
+                tiles.append(tileIndex)
+                if len(tiles) == length:
+                    break
+        return tiles
 
     def writeBlank(self, column, row):
-        # This writes a blank space at a given
-        self.tilegrid[column, row] = self.blankGlyph
-        #self.cursorX=self.cursorX+1  ##****
-
-    def scrollUp(self):
-        # move everything down, copying from the bottom up
-        if self.cursorWhileScrolling == False:
-            self.cursorOff()
-        for row in range(self.rows - 1, 0, -1):
-            for column in range(0, self.columns):
-                self.tilegrid[column, row] = self.tilegrid[column, row - 1]
-
-        # set the first row to blank
-        for column in range(0, self.columns):
-            self.writeBlank(column, 0)
-        self.setCursor(self.cursorX, self.cursorY + 1)
-        if self.cursorWhileScrolling == False:
-            self.cursorOn()
+        # This writes a blank space at a given location
+        if (0 <= column < self.columns) and (0 <= row < self.rows):
+            self.outputCount += 1
+            self._setTile(column, row, self.blankGlyph)
+            if self.spans[row]:
+                self._setSpan(row, column, column + 1, None)
+
+    def _rowOffset(self, row):
+        # offset of a logical row in the shadow buffer
+        return ((row + self.topRow) % self.rows) * self.columns
+
+    def _setTile(self, column, row, tileIndex):
+        # update a single cell, only touches the tilegrid if the cell changed
+        if self.viewOffset:
+            self.setViewOffset(0)
+        physicalRow = (row + self.topRow) % self.rows
+        i = physicalRow * self.columns + column
+        if self.buffer[i] != tileIndex:
+            self.buffer[i] = tileIndex
+            if self.deferred:
+                return
+            tilegrid, gridRow = self.gridRows[physicalRow]
+            tilegrid[column, gridRow] = tileIndex
+            self.dirtyRows[row] = 1
+            self.dirty = True
+
+    def _putTiles(self, column, row, tiles):
+        # Copy a run of tile indices into one row of the shadow buffer starting at column,
+        # then send only the cells that changed to the tilegrid.
+        if self.viewOffset:
+            self.setViewOffset(0)
+        buffer = self.buffer
+        physicalRow = (row + self.topRow) % self.rows
+        start = physicalRow * self.columns + column
+        if buffer[start : start + len(tiles)] == tiles:
+            return  # nothing changed on this row
+        if self.deferred:
+            buffer[start : start + len(tiles)] = tiles
+            return
+        self.dirtyRows[row] = 1
+        self.dirty = True
+        tilegrid, gridRow = self.gridRows[physicalRow]
+        for i in range(len(tiles)):
+            if buffer[start + i] != tiles[i]:
+                buffer[start + i] = tiles[i]
+                tilegrid[column + i, gridRow] = tiles[i]
+        if row == self.cursorY and column <= self.cursorX < column + len(tiles):
+            self.writeCursorChar()  # keep the cursor showing the new glyph
+
+    def _getRows(self, top, bottom):
+        # returns a copy of the logical rows top..bottom (inclusive)
+        columns = self.columns
+        if self.topRow == 0:
+            return self.buffer[top * columns : (bottom + 1) * columns]
+        region = bytearray()
+        for row in range(top, bottom + 1):
+            start = self._rowOffset(row)
+            region += self.buffer[start : start + columns]
+        return region
+
+    def _putRows(self, firstRow, tiles):
+        # Replace whole rows starting at firstRow with tiles (a multiple of columns long)
+        columns = self.columns
+        for i in range(len(tiles) // columns):
+            self._putTiles(0, firstRow + i, tiles[i * columns : (i + 1) * columns])
+
+    def _moveRows(self, top, bottom, count):
+        # Move the rows top..bottom (inclusive) down by count rows (up if count is negative),
+        # the rows that are exposed are filled with blanks.
+        # The move is done with slices on the shadow buffer, then only the changed cells are sent to the tilegrid.
+        if self.viewOffset:
+            self.setViewOffset(0)
+        lines = min(abs(count), bottom + 1 - top)
+        if self.ringScroll and top == 0 and bottom == self.rows - 1 and lines < self.rows:
+            self._rotateRows(count // abs(count) * lines)
+        else:
+            columns = self.columns
+            region = self._getRows(top, bottom)
+            shift = lines * columns
+            if count > 0:
+                region = self.blankRow * lines + region[: len(region) - shift]
+            else:
+                region = region[shift:] + self.blankRow * lines
+            self._putRows(top, region)
+        if self.overlayGroup is not None:  # after the buffer, the waiting spans copy its glyphs
+            self._moveSpans(top, bottom, count // abs(count) * lines)
+
+    def _rotateRows(self, count):
+        # ringScroll: move the whole screen down by count rows (up if negative) by rotating
+        # the top row, only the exposed rows are blanked and the row tilegrids are repositioned.
+        self.topRow = (self.topRow - count) % self.rows
+        if count > 0:
+            exposed = range(0, count)
+        else:
+            exposed = range(self.rows + count, self.rows)
+        for row in exposed:
+            self._putTiles(0, row, self.blankRow)
+        if not self.deferred:
+            self._placeRows()
+
+    def _placeRows(self):
+        # ringScroll: move each row tilegrid to the position of its logical row
+        for physicalRow in range(self.rows):
+            self.rowTileGrids[physicalRow].y = (
+                self.yPixels + ((physicalRow - self.topRow) % self.rows) * self.fontH
+            )
+        self._markAllDirty()  # every row moved
+
+    def setScrollRegion(self, top=None, bottom=None):
+        # Limit scrolling to the rows top..bottom (inclusive), None resets to the full terminal.
+        # A region of less than two rows is ignored, like on a VT100.  The cursor is not moved.
+        if top is None or top < 0:
+            top = 0
+        if bottom is None or bottom > self.rows - 1:
+            bottom = self.rows - 1
+        if top < bottom:
+            self.scrollTop = top
+            self.scrollBottom = bottom
 
-    def scrollDown(self):
-        # move everything down, copying from the bottom up
-        if self.cursorWhileScrolling == False:
-            self.cursorOff()
-        for row in range(0, self.rows - 1):
-            for column in range(0, self.columns):
-                self.tilegrid[column, row] = self.tilegrid[column, row + 1]
+    def scrollUp(self, count=1):
+        # move everything in the scroll region down by count rows, the first count rows are set to blank
+        # The cursor moves with the text.
+        self._scroll(count, True)
 
-        # set the first row to blank
-        for column in range(0, self.columns):
-            self.writeBlank(column, self.rows - 1)
+    def scrollDown(self, count=1):
+        # move everything in the scroll region up by count rows, the last count rows are set to blank
+        # The cursor moves with the text.
+        self._scroll(-count, True)
+        # check scrolling max column to make sure that it scrolls properly even for filled lines to end of the line display
 
-        self.setCursor(self.cursorX, self.cursorY - 1)
+    def lineFeed(self):
+        # VT100 line feed: move the cursor down one row, at the bottom of the scroll region the
+        # text in the region is scrolled up instead and the cursor stays on the bottom row.
+        if self.cursorY == self.scrollBottom:
+            if self.deferDepth:  # sent with the other scrolls by endDeferred()
+                self.outputCount += 1
+                self._deferredScroll(-1)
+            else:
+                self._scroll(-1, False)
+        elif self.cursorY < self.rows - 1:
+            self.setCursor(self.cursorX, self.cursorY + 1)
+
+    def reverseIndex(self):
+        # VT100 reverse index: move the cursor up one row, at the top of the scroll region the
+        # text in the region is scrolled down instead and the cursor stays on the top row.
+        if self.cursorY == self.scrollTop:
+            if self.deferDepth:
+                self.outputCount += 1
+                self._deferredScroll(1)
+            else:
+                self._scroll(1, False)
+        elif self.cursorY > 0:
+            self.setCursor(self.cursorX, self.cursorY - 1)
+
+    def insertLines(self, count=1):
+        # VT100 insert line (ESC[nL): insert count blank lines at the cursor row, the rows from
+        # the cursor down to the bottom of the scroll region move down and the last ones are
+        # lost.  Only those rows are touched.  Does nothing if the cursor is outside the scroll
+        # region.  The cursor moves to the start of the line.
+        self._editLines(count)
+
+    def deleteLines(self, count=1):
+        # VT100 delete line (ESC[nM): delete count lines at the cursor row, the rows below move
+        # up and blank lines are added at the bottom of the scroll region, see insertLines.
+        self._editLines(-count)
+
+    def _editLines(self, count):
+        if count == 0 or not (self.scrollTop <= self.cursorY <= self.scrollBottom):
+            return
+        self.outputCount += 1
+        self._moveRows(self.cursorY, self.scrollBottom, count)
+        self.setCursor(0, self.cursorY)
+
+    def insertChars(self, count=1):
+        # VT100 insert character (ESC[n@): insert count blanks at the cursor, the rest of the
+        # line moves right and the characters moved past the right edge are lost.
+        # Only the cells from the cursor to the end of the line are touched, the cursor does not move.
+        self._editChars(count)
+
+    def deleteChars(self, count=1):
+        # VT100 delete character (ESC[nP): delete count characters at the cursor, the rest of
+        # the line moves left and blanks are added at the end, see insertChars.
+        self._editChars(-count)
+
+    def _editChars(self, count):
+        column = self.cursorX
+        row = self.cursorY
+        columns = self.columns
+        if count == 0 or not ((0 <= column < columns) and (0 <= row < self.rows)):
+            return
+        self.outputCount += 1
+        count = max(-(columns - column), min(count, columns - column))
+        start = self._rowOffset(row)
+        line = self.buffer[start + column : start + columns]
+        if count > 0:
+            tiles = self.blankRow[:count] + line[: len(line) - count]
+        else:
+            tiles = line[-count:] + self.blankRow[:-count]
+        self._putTiles(column, row, tiles)
+        if self.spans[row]:
+            self._shiftSpans(row, column, count)
+
+    def _shiftSpans(self, row, column, count):
+        # move the highlights of row from column on by count cells with the text, see _editChars
+        moved = []
+        for span in self.spans[row]:
+            start = max(span[0], column)
+            end = span[1]
+            if count < 0:  # the cells column..column-count-1 were deleted
+                start = max(start, column - count)
+            if start < end:
+                moved.append((start + count, min(end + count, self.columns), span[2]))
+        self._setSpan(row, column, self.columns, None)
+        for start, end, attribute in moved:
+            if start < end:
+                self._setSpan(row, start, end, attribute)
+
+    def _scroll(self, count, moveCursor):
+        # Scroll the text in the scroll region down by count rows (up if count is negative) in one pass.
+        # The cursor is hidden once for the whole move and then restored to its previous state.
+        if count == 0:
+            return
+        self.outputCount += 1
+        if self.viewOffset:
+            self.setViewOffset(0)
+        cursorShowing = self.cursorStatus
         if self.cursorWhileScrolling == False:
+            self.cursorOff()
+        if count < 0 and self.scrollTop == 0:
+            # the top rows scroll off the terminal, keep them in the history
+            self._saveHistory(min(-count, self.scrollBottom + 1))
+        self._moveRows(self.scrollTop, self.scrollBottom, count)
+        if moveCursor:
+            self.setCursor(self.cursorX, self.cursorY + count)
+        else:
+            self.writeCursorChar()
+        if cursorShowing:
             self.cursorOn()
-        # check scrolling max column to make sure that it scrolls properly even for filled lines to end of the line display
+
+    def _saveHistory(self, count):
+        # append the first count rows of the terminal to the scrollback history
+        if self.scrollback == 0:
+            return
+        columns = self.columns
+        for row in range(max(0, count - self.scrollback), count):
+            start = self._rowOffset(row)
+            head = self.historyHead * columns
+            self.history[head : head + columns] = self.buffer[start : start + columns]
+            self.historyHead = (self.historyHead + 1) % self.scrollback
+        self.historyCount = min(self.historyCount + count, self.scrollback)
+
+    def scrollbackMemory(self):
+        # the number of bytes used by the scrollback history (scrollback lines x columns)
+        return len(self.history)
+
+    def _viewRow(self, offset, row):
+        # the tiles shown on row when paged back by offset lines
+        columns = self.columns
+        if row < offset:
+            line = (self.historyHead - offset + row) % self.scrollback
+            return self.history[line * columns : (line + 1) * columns]
+        start = self._rowOffset(row - offset)
+        return self.buffer[start : start + columns]
+
+    def setViewOffset(self, offset):
+        # Page back through the scrollback history, offset is the number of history lines
+        # shown above the live terminal (0 shows the live terminal).  Only the visible rows
+        # are rendered and only the cells that differ from what is shown are written.
+        # Any change to the terminal returns the view to the live terminal.
+        offset = max(0, min(offset, self.historyCount))
+        if offset == self.viewOffset:
+            return
+        oldOffset = self.viewOffset
+        if oldOffset == 0:
+            self.viewCursor = self.cursorStatus
+            self.cursorOff()  # the cursor is hidden while paged back
+            if self.overlayGroup is not None:
+                self.overlayGroup.hidden = True  # and so are the highlights
+        columns = self.columns
+        for row in range(self.rows):
+            old = self._viewRow(oldOffset, row)
+            new = self._viewRow(offset, row)
+            if old != new:
+                tilegrid, gridRow = self.gridRows[(row + self.topRow) % self.rows]
+                for column in range(columns):
+                    if old[column] != new[column]:
+                        tilegrid[column, gridRow] = new[column]
+                self.dirtyRows[row] = 1
+                self.dirty = True
+        self.viewOffset = offset
+        if offset == 0:
+            if self.overlayGroup is not None:
+                self.overlayGroup.hidden = False
+            if self.viewCursor:
+                self.cursorOn()
+
+    def fill(self, column0, row0, column1, row1, char=" "):
+        # Fill the cells from column0, row0 up to (not including) column1, row1 with char,
+        # the region is clipped to the terminal.  displayio tilegrids have no fill, so each row
+        # is compared with the shadow buffer and only the cells that differ are written, a
+        # region that is already blank costs no tile writes.  Highlights in the region are removed.
+        tileIndex = self.tileIndex(ord(char))
+        column0 = max(column0, 0)
+        column1 = min(column1, self.columns)
+        if tileIndex is None or column0 >= column1:
+            return
+        self.outputCount += 1
+        tiles = bytes([tileIndex]) * (column1 - column0)
+        for row in range(max(row0, 0), min(row1, self.rows)):
+            self._putTiles(column0, row, tiles)
+            if self.spans[row]:
+                self._setSpan(row, column0, column1, None)
 
     def clearEOL(self):
-        if (self.cursorX < self.columns) and (self.cursorY < self.rows):  # only do something if the cursor position is within the display bounds
-            for column in range(self.cursorX, self.columns):
-                self.writeBlank(column, self.cursorY)
+        if (0 <= self.cursorX < self.columns) and (0 <= self.cursorY < self.rows):  # only do something if the cursor position is within the display bounds
+            self.fill(self.cursorX, self.cursorY, self.columns, self.cursorY + 1)
 
     def clearAll(self):
-        for row in range(0, self.rows):
-            for column in range(0, self.columns):
-                self.writeBlank(column, row)
+        self.fill(0, 0, self.columns, self.rows)
+
+    def eraseInLine(self, mode=0):
+        # VT100 erase in line (ESC[nK) on the cursor row: 0 clears from the cursor to the end of
+        # the line, 1 from the start of the line through the cursor, 2 the whole line
+        row = self.cursorY
+        if mode == 0:
+            self.fill(self.cursorX, row, self.columns, row + 1)
+        elif mode == 1:
+            self.fill(0, row, self.cursorX + 1, row + 1)
+        elif mode == 2:
+            self.fill(0, row, self.columns, row + 1)
+
+    def eraseInDisplay(self, mode=0):
+        # VT100 erase in display (ESC[nJ): 0 clears from the cursor to the end of the terminal,
+        # 1 from the start of the terminal through the cursor, 2 the whole terminal.
+        # The cursor does not move.
+        row = self.cursorY
+        if mode == 0:
+            self.eraseInLine(0)
+            self.fill(0, row + 1, self.columns, self.rows)
+        elif mode == 1:
+            self.fill(0, 0, self.columns, row)
+            self.eraseInLine(1)
+        elif mode == 2:
+            self.fill(0, 0, self.columns, self.rows)
+
+    def setAttribute(self, textColor=None, bgColor=None):
+        # Sets the colors for the text written from now on, None uses the terminal's color.
+        # setAttribute() goes back to normal text.
+        if textColor is None:
+            textColor = self.textColor
+        if bgColor is None:
+            bgColor = self.bgColor
+        if textColor == self.textColor and bgColor == self.bgColor:
+            self.attribute = None
+        else:
+            self.attribute = (textColor, bgColor)
+
+    def _attributeRun(self, row, start, end):
+        # record the current attribute for the cells start..end-1 that were just written on row
+        if (
+            start < end
+            and (0 <= row < self.rows)
+            and (self.attribute is not None or self.spans[row])
+        ):
+            self._setSpan(row, start, end, self.attribute)
+
+    def _setSpan(self, row, start, end, attribute):
+        # Set the attribute of the cells start..end-1 on row (None for normal text).
+        # Only the spans on this row that overlap the cells are changed.
+        spans = self.spans[row]
+        for span in spans:
+            if span[0] <= start and end <= span[1] and span[2] == attribute:
+                self._showSpanTiles(row, span, start, end)  # same highlight, new text
+                return
+        newSpans = []
+        for span in spans:
+            if span[1] < start or span[0] > end:  # not touching
+                newSpans.append(span)
+            elif span[2] != attribute and (span[1] == start or span[0] == end):
+                newSpans.append(span)  # next to the new span, but a different attribute
+            elif span[2] == attribute:  # touching the new span, merge them
+                start = min(start, span[0])
+                end = max(end, span[1])
+                self._hideSpan(row, span)
+            else:  # keep the parts that are outside the new span
+                self._hideSpan(row, span)
+                if span[0] < start:
+                    newSpans.append(self._makeSpan(row, span[0], start, span[2]))
+                if span[1] > end:
+                    newSpans.append(self._makeSpan(row, end, span[1], span[2]))
+        if attribute is not None:
+            newSpans.append(self._makeSpan(row, start, end, attribute))
+        newSpans.sort()
+        self.spans[row] = newSpans
+        if self.pendingSpans and len(self.overlayGroup) < self.maxHighlights:
+            self._showPending()
+
+    def _makeSpan(self, row, start, end, attribute):
+        # create a span and its overlay tilegrid, showing the glyphs from the buffer
+        if self.overlayGroup is None:
+            self.overlayGroup = displayio.Group(max_size=self.maxHighlights, scale=1)
+            self.overlayGroup.hidden = self.viewOffset > 0
+            self.displayGroup.insert(1, self.overlayGroup)
+        span = [start, end, attribute, None]
+        if len(self.overlayGroup) < self.maxHighlights:
+            self._showSpan(row, span)
+        else:  # the span waits until an overlay is freed, see _showPending
+            self.pendingSpans += 1
+        return span
+
+    def _showSpan(self, row, span):
+        # create the overlay tilegrid of a span
+        textColor, bgColor = span[2]
+        span[3] = displayio.TileGrid(
+            bitmap=self.font.bitmap,
+            pixel_shader=colorPalette(bgColor, textColor),
+            x=self.xPixels + span[0] * self.fontW,
+            y=self.yPixels + row * self.fontH,
+            width=span[1] - span[0],
+            height=1,
+            tile_width=self.fontW,
+            tile_height=self.fontH,
+        )
+        self._showSpanTiles(row, span, span[0], span[1])
+        self.overlayGroup.append(span[3])
+
+    def _showPending(self):
+        # give the freed overlays to the spans that are waiting for one, from the top row down
+        for row in range(self.rows):
+            for span in self.spans[row]:
+                if span[3] is None:
+                    if len(self.overlayGroup) >= self.maxHighlights:
+                        return
+                    self._showSpan(row, span)
+                    self.pendingSpans -= 1
+
+    def _showSpanTiles(self, row, span, start, end):
+        # copy the glyphs of the cells start..end-1 into the span's overlay
+        if span[3] is not None:
+            offset = self._rowOffset(row)
+            for column in range(start, end):
+                span[3][column - span[0], 0] = self.buffer[offset + column]
+            self.dirtyRows[row] = 1
+            self.dirty = True
+
+    def _hideSpan(self, row, span):
+        # remove a span's overlay, or stop waiting for one
+        if span[3] is not None:
+            self.overlayGroup.remove(span[3])
+            span[3] = None
+            self.dirtyRows[row] = 1
+            self.dirty = True
+        else:
+            self.pendingSpans -= 1
 
+    def _moveSpans(self, top, bottom, count):
+        # move the spans of rows top..bottom (inclusive) with the text, see _moveRows
+        if count > 0:
+            dropped = range(bottom + 1 - count, bottom + 1)
+        else:
+            dropped = range(top, top - count)
+        for row in dropped:
+            for span in self.spans[row]:
+                self._hideSpan(row, span)
+        moved = self.spans[top : bottom + 1]
+        if count > 0:
+            moved = [[] for i in range(count)] + moved[: len(moved) - count]
+        else:
+            moved = moved[-count:] + [[] for i in range(-count)]
+        self.spans[top : bottom + 1] = moved
+        for row in range(top, bottom + 1):
+            for span in self.spans[row]:
+                if span[3] is not None:
+                    span[3].y = self.yPixels + row * self.fontH
+                    self.dirtyRows[row] = 1  # the rows the overlay left and now covers
+                    self.dirtyRows[row - count] = 1
+                    self.dirty = True
+        if self.pendingSpans and len(self.overlayGroup) < self.maxHighlights:
+            self._showPending()
+
+
+# colors for the ANSI color numbers 0-7 and the bright colors 8-15
+ANSI_COLORS = (
+    0x000000,  # black
+    0xCD0000,  # red
+    0x00CD00,  # green
+    0xCDCD00,  # yellow
+    0x0000EE,  # blue
+    0xCD00CD,  # magenta
+    0x00CDCD,  # cyan
+    0xE5E5E5,  # white
+    0x7F7F7F,  # bright black (gray)
+    0xFF0000,  # bright red
+    0x00FF00,  # bright green
+    0xFFFF00,  # bright yellow
+    0x5C5CFF,  # bright blue
+    0xFF00FF,  # bright magenta
+    0x00FFFF,  # bright cyan
+    0xFFFFFF,  # bright white
+)
+
+# VT100 parser states used by editorTerminal
+_GROUND = 0  # printable text
+_ESCAPE = 1  # after ESC
+_CSI = 2  # after ESC [, collecting parameters
+
+# what the parser looks for in str and in bytes text: escape, newline, carriage return,
+# backspace and the two forms of clear to end of line
+_TEXT_MARKS = ("\x1b", "\n", "\r", "\b", "\x1b[K", "\x1b[0K")
+_BYTE_MARKS = (b"\x1b", b"\n", b"\r", b"\b", b"\x1b[K", b"\x1b[0K")
+
+
+def _scanRun(view, start, length):
+    # the ground state of editorTerminal.writeToTerminal for a memoryview, which has no find():
+    # returns the end of the run of text from start (the next escape or newline) and the end
+    # of a clear EOL (ESC[K or ESC[0K) right after it, or 0 if there is none or the run has \r
+    # or \b and so cannot be drawn with writeLine
+    end = start
+    plain = True
+    while end < length:
+        code = view[end]
+        if code == 0x1B or code == 0x0A:
+            break
+        if code == 0x0D or code == 0x08:
+            plain = False
+        end = end + 1
+    if plain and end + 2 < length and view[end] == 0x1B and view[end + 1] == 0x5B:
+        if view[end + 2] == 0x4B:
+            return end, end + 3
+        if view[end + 2] == 0x30 and end + 3 < length and view[end + 3] == 0x4B:
+            return end, end + 4
+    return end, 0
+
+
+class _paneDisplay:
+    # The display refresh cycle shared by editorTerminal and paneManager: the terminals in
+    # self.panes are shown together on self.display and are refreshed by one flush().
+    # targetFPS=None: the display auto refreshes, but not while an update is in progress.
+    # targetFPS set: auto_refresh is off, changes are collected and refreshed at most once
+    #   per frame by tick() or at the end of an update.  Call flush() to refresh immediately.
+    __slots__ = (
+        "display", "panes", "displayGroup", "targetFPS", "blinkPeriod", "_updateDepth",
+        "_nextFrame",
+    )
+
+    def _beginUpdate(self):
+        # Hold off refreshes while the terminals are changed.  Every _beginUpdate() must be
+        # followed by _endUpdate() in a finally clause, or an error would stop the refreshes.
+        # The scrolls of the panes are held for the whole update (see simpleTerminal.beginDeferred),
+        # so a burst of new lines costs at most one screen of tile writes.
+        self._updateDepth+=1
+        if self._updateDepth==1:
+            for pane in self.panes:
+                pane.beginDeferred()
+        if self.targetFPS is None:
+            self.display.auto_refresh=False
+
+    def _endUpdate(self):
+        self._updateDepth-=1
+        if self._updateDepth==0:
+            for pane in self.panes:
+                pane.endDeferred()
+            if self.targetFPS is None:
+                self.display.auto_refresh=True
+            else:
+                self.tick()
 
-class editorTerminal:
+    def flush(self):
+        # Refresh the display once if anything changed, returns True if the display was refreshed
+        for pane in self.panes:
+            if pane.dirty:
+                break
+        else:
+            return False
+        if self.display.refresh(minimum_frames_per_second=0) == False:
+            return False # too soon for the display, the changes are kept for the next flush
+        for pane in self.panes:
+            pane.clearDirty()
+        return True
+
+    def dirtyRects(self):
+        # the pixel rectangles of all the panes that changed since the last flush(), see
+        # simpleTerminal.dirtyRects
+        rects = []
+        for pane in self.panes:
+            rects += pane.dirtyRects()
+        return rects
+
+    def tick(self, now=None):
+        # With targetFPS, refresh the changes if the next frame is due.  Call this from the
+        # application's main loop so the last changes are shown once the output stops.
+        # With blinkPeriod, this also blinks the cursor (see simpleTerminal.blinkTick).
+        if self.blinkPeriod is not None and self._updateDepth==0:
+            if now is None:
+                now=time.monotonic()
+            for pane in self.panes:
+                pane.blinkTick(now)
+        if self.targetFPS is None:
+            return
+        if now is None:
+            now=time.monotonic()
+        if now >= self._nextFrame:
+            if self.flush():
+                self._nextFrame=now+1/self.targetFPS
+
+    async def blinkTask(self):
+        # asyncio task that calls tick() for the cursor blinking and the frame refreshes
+        import asyncio
+
+        if self.targetFPS is None:
+            delay=(self.blinkPeriod or 1)/4
+        else:
+            delay=1/self.targetFPS
+        while True:
+            self.tick()
+            await asyncio.sleep(delay)
+
+
+class editorTerminal(_paneDisplay):
 
 # input variables
 # pixelsX, pixelsY - display size
@@ -310,7 +1453,39 @@ class editorTerminal:
 
 # Questions: Do we want to turn cursor on when editing the status row?
 # Maybe can just turn on when the cursor is on the statusRow.
-    import terminalio, displayio
+    __slots__ = (
+        "stats", "font", "displayRows", "displayColumns", "statusRow", "bgColor",
+        "textColor", "x", "y", "cursorX", "cursorY", "cursorDisplay", "cursorWhileScrolling",
+        "mainTerminal", "statusTerminal", "_state", "_params", "_param", "_private", "_bold",
+        "_reverse", "_textColor", "_bgColor", "_csiCommands", "queueSize", "_queue",
+        "_queued", "_queueReady", "_queueSpace", "statusHz", "_statusSegments",
+        "_statusFields", "_statusTexts", "_statusCount", "_statusPending", "_nextStatus",
+    )
+
+##########ifdef VT100
+##    if termcap_vt100:
+    TERMCAP = (  ## list of terminal control strings (from robert-hh/Micropython-Editor)
+        "\x1b[{row};{col}H",    ## 0: Set cursor
+        "\x1b[0K",              ## 1: Clear EOL
+        "\x1b[?25h",            ## 2: Cursor ON
+        "\x1b[?25l",            ## 3: Cursor OFF
+        "\x1b[0m",              ## 4: Hilite 0 - normal text
+        "\x1b[1;37;46m",        ## 5: Hilite 1 - Entering the status line
+        "\x1b[43m",             ## 6: Hilite 2 - Highlighting Text
+        '\x1b[?9h',             ## 7: Mouse reporting on
+        '\x1b[?9l',             ## 8: Mouse reporting off
+        "\x1bM",                ## 9: Scroll one line up
+        "\n",                   ## 10: Scroll one line down
+        '\x1b[1;{stop}r',       ## 11: Set lowest line of scrolling range
+        '\x1b[r',               ## 12: Scroll the full screen
+        '\x1b[999;999H\x1b[6n', ## 13: Report Screen size command
+                                ## 14: Status line format. Elements may be omitted
+        "{chd}{file} Row: {row}/{total} Col: {col}  {msg}",
+        "\b"                    ## 15: backspace one character, used in line_edit
+    )
+############
+
+    terminalClass = simpleTerminal  # the class of the main and status terminals
 
     def __init__(
         self,
@@ -327,18 +1502,24 @@ class editorTerminal:
         cursorY=0, # initial row position of the cursor
         cursorDisplay=True,
         cursorWhileScrolling=False,
+        targetFPS=None, # if set, auto_refresh is turned off and refreshes are limited to this rate
+        blinkPeriod=None, # seconds between cursor blinks, driven by tick() or blinkTask()
+        queueSize=1024, # characters that awrite() can queue before the writers have to wait
+        statusHz=None, # if set, setStatus() redraws the status line at most this often
+        stats=None, # a terminalStats shared by both terminals, see statsEditorTerminal
     ):
         self.display=display
+        self.stats=stats
+        self.blinkPeriod=blinkPeriod
         self.font=font
         fontW, fontH = self.font.get_bounding_box()
 
-        from math import floor
-        from simpleTerminal import simpleTerminal
-
-        if rows==None:
-            self.displayRows=floor(displayYPixels/fontH) # total display rows (main and status)
-        if columns==None:
-            self.displayColumns=floor(displayXPixels/fontW)
+        if rows is None:
+            rows=displayYPixels//fontH # total display rows (main and status)
+        if columns is None:
+            columns=displayXPixels//fontW
+        self.displayRows=rows
+        self.displayColumns=columns
         self.statusRow=self.displayRows-1 # This is the row that houses the highlighted status row
         self.bgColor=bgColor
         self.textColor=textColor
@@ -355,127 +1536,395 @@ class editorTerminal:
         # instance the two terminals
         #
         # Instance the main terminal (subtract one row from total for status terminal)
-        self.mainTerminal=simpleTerminal(rows=self.displayRows-1,columns=self.displayColumns, # subtract one row for the status row
+        self.mainTerminal=self.terminalClass(rows=self.displayRows-1,columns=self.displayColumns, # subtract one row for the status row
                                          x=self.x, y=self.y,
                                          textColor=self.textColor, bgColor=self.bgColor,
                                          font=self.font,
                                          cursorDisplay=self.cursorDisplay,
-                                         cursorWhileScrolling=cursorWhileScrolling)
+                                         cursorWhileScrolling=cursorWhileScrolling,
+                                         blinkPeriod=blinkPeriod,
+                                         stats=stats)
 
         # Instance the status terminal, cursorDisplay is OFF
         yStatusLine=self.mainTerminal.pixelHeight+1 # the status line y-position is just below the upper main terminal
-        self.statusTerminal=simpleTerminal(rows=1,columns=self.displayColumns,
+        self.statusTerminal=self.terminalClass(rows=1,columns=self.displayColumns,
                                            x=self.x, y=yStatusLine,
                                            textColor=self.bgColor, bgColor=self.textColor, # swap the color palette versus the main terminal
+                                           font=self.font,
                                            cursorDisplay=False,
-                                           cursorWhileScrolling=False)
+                                           cursorWhileScrolling=False,
+                                           blinkPeriod=blinkPeriod,
+                                           stats=stats)
 
 
         self.displayGroup=displayio.Group(max_size=2, scale=1) # this holds the display terminals for displayio
         self.displayGroup.append(self.mainTerminal.displayGroup)
         self.displayGroup.append(self.statusTerminal.displayGroup)
-
-        self.display.auto_refresh=True  # ensure display auto refreshes
+        self.panes=(self.mainTerminal, self.statusTerminal)
+
+        # VT100 parser state, kept between writes
+        self._state=_GROUND
+        self._params=[]
+        self._param=-1
+        self._private=False
+        self._bold=False # graphic rendition (SGR) state
+        self._reverse=False
+        self._textColor=None
+        self._bgColor=None
+        self._csiCommands={ # CSI final character -> handler
+            "H": self._csiSetCursor,
+            "f": self._csiSetCursor,
+            "K": self._csiClearEOL,
+            "J": self._csiEraseDisplay,
+            "L": self._csiInsertLines,
+            "M": self._csiDeleteLines,
+            "@": self._csiInsertChars,
+            "P": self._csiDeleteChars,
+            "h": self._csiSetMode,
+            "l": self._csiResetMode,
+            "m": self._csiGraphics,
+            "r": self._csiScrollRegion,
+            # "n": 13 Report Screen size - use editorTerminal.getScreenSize()
+        }
+
+        # Display refresh control, see _paneDisplay
+        self.targetFPS=targetFPS
+        self._updateDepth=0 # nesting of _beginUpdate/_endUpdate
+        self._nextFrame=0
+
+        # asyncio output queue, see awrite() and renderTask().  The events are created by
+        # the first awrite() or renderTask(), so asyncio is only imported when it is used.
+        self.queueSize=queueSize
+        self._queue=[] # text waiting for the renderer
+        self._queued=0 # number of characters in _queue
+        self._queueReady=None # set when there is text in the queue
+        self._queueSpace=None # set when the renderer emptied the queue
+
+        # status line, see setStatus()
+        self.statusHz=statusHz
+        self._statusSegments=None # TERMCAP 14 split into (literal text, None) and (field format, field name)
+        self._statusFields={} # the latest value of each field
+        self._statusTexts=None # the text of each segment as it is shown
+        self._statusCount=0 # statusTerminal.outputCount after the last status update
+        self._statusPending=False # fields changed but the redraw waits for the rate limit
+        self._nextStatus=0
+
+        self.display.auto_refresh=(targetFPS is None)  # ensure display auto refreshes
         self.display.show(self.displayGroup) # add group to the display
                                             #  Do we need to clear any other groups from the display?
 
+    def _queueEvents(self):
+        if self._queueReady is None:
+            import asyncio
+
+            self._queueReady=asyncio.Event()
+            self._queueSpace=asyncio.Event()
+
+    async def awrite(self, text):
+        # Queue text for renderTask().  If the queue holds queueSize characters, this waits
+        # until the renderer has drawn them.  Text longer than queueSize is queued once the
+        # queue is empty.  A bytearray or memoryview is copied into bytes, since the caller
+        # may reuse its buffer before the text is drawn.
+        if not isinstance(text, (str, bytes)):
+            text=bytes(text)
+        self._queueEvents()
+        while self._queued and self._queued+len(text) > self.queueSize:
+            self._queueSpace.clear()
+            await self._queueSpace.wait()
+        self._queue.append(text)
+        self._queued+=len(text)
+        self._queueReady.set()
+
+    def drainQueue(self):
+        # Write all the queued text in one update, returns the number of characters written.
+        # The queued str and bytes are joined into one write for each run of the same type.
+        queue=self._queue
+        if not queue:
+            return 0
+        self._queue=[]
+        self._queued=0
+        count=0
+        self._beginUpdate()
+        try:
+            start=0
+            while start < len(queue):
+                kind=type(queue[start])
+                end=start+1
+                while end < len(queue) and type(queue[end]) is kind:
+                    end+=1
+                text=("" if kind is str else b"").join(queue[start:end])
+                self.write(text)
+                count+=len(text)
+                start=end
+        finally:
+            self._endUpdate()
+        if self.targetFPS is not None:
+            self.flush()  # one refresh for everything written in this frame
+        if self._queueSpace is not None:
+            self._queueSpace.set()
+        return count
+
+    async def renderTask(self):
+        # asyncio task that draws the text queued by awrite() at most once per frame
+        # (targetFPS, or 30 frames per second with auto refresh)
+        import asyncio
+
+        self._queueEvents()
+        frame=1/(self.targetFPS or 30)
+        while True:
+            await self._queueReady.wait()
+            self._queueReady.clear()
+            self.drainQueue()
+            await asyncio.sleep(frame) # let the writers fill the queue for the next frame
+
     def deinit_display(self):
         self.display.show(None)
 
     def writeToTerminal(self, thisTerminal, text):
         # This writes text to a selected terminal (the mainTerminal or the statusTerminal)
         #
-        # First decode and process any special characters (EOL, backspace, newline, etc.)
-        #   This handles a set of commands from robert-hh/Micropython-editor
-        #
-        # commands to consider handling
-        # "\b" backspace
-        # hilite function (?) - pass
-        # mouse functions
+        # The text is fed through a VT100 parser (ground/ESC/CSI) that keeps its state
+        # between calls, so escape sequences can be mixed with text or split across writes.
+        # Runs of printable text (including \r and \b) are passed to thisTerminal.write(),
+        # after a cursor positioning command the text goes to whichever terminal holds the cursor.
+        # text can also be UTF-8 bytes, bytearray or memoryview: bytes and bytearray are searched
+        # with find() like a str, a memoryview has no find() and is scanned in place byte by
+        # byte.  The runs of text are passed on as memoryview slices, nothing is copied.
+        decode = not isinstance(text, str)
+        scan = isinstance(text, memoryview)
+        if decode:
+            view = text if scan else memoryview(text)
+            marks = _BYTE_MARKS
+        else:
+            view = text
+            marks = _TEXT_MARKS
+        escape, newline, carriageReturn, backspace, clearEOL, clearEOL0 = marks
+        state = self._state
+        length = len(text)
+        i = 0
+        while i < length:
+            if state == _GROUND:
+                # find the end of the run of text, at the next escape or newline, and where a
+                # clear EOL right after it ends (0 if there is none, or the run has \r or \b)
+                if scan:
+                    end, after = _scanRun(text, i, length)
+                else:
+                    end = text.find(escape, i)
+                    if end < 0:
+                        end = length
+                    lineEnd = text.find(newline, i, end)
+                    if lineEnd >= 0:
+                        end = lineEnd
+                    if text.startswith(clearEOL, end):
+                        after = end + len(clearEOL)
+                    elif text.startswith(clearEOL0, end):
+                        after = end + len(clearEOL0)
+                    else:
+                        after = 0
+                    if after and (
+                        text.find(carriageReturn, i, end) >= 0 or text.find(backspace, i, end) >= 0
+                    ):
+                        after = 0
+                if end > i:
+                    # text followed by clear EOL, as used when redrawing a line
+                    if after and self._writeLine(thisTerminal, view[i:end]):
+                        self._syncCursor(thisTerminal)
+                        i = after
+                        continue
+                    thisTerminal.write(view[i:end])
+                    self._syncCursor(thisTerminal)
+                    i = end
+                    continue
+                code = text[i] if decode else ord(text[i])
+                if code == 0x0A:  ## 10: Scroll one line down (at the bottom row)
+                    thisTerminal.lineFeed()
+                    self._syncCursor(thisTerminal)
+                else:
+                    state = _ESCAPE
+            elif state == _ESCAPE:
+                code = text[i] if decode else ord(text[i])
+                if code == 0x5B:  # "["
+                    state = _CSI
+                    self._params = []
+                    self._param = -1
+                    self._private = False
+                else:
+                    if code == 0x4D:  ## 9: Scroll one line up (at the top row), "M"
+                        thisTerminal.reverseIndex()
+                        self._syncCursor(thisTerminal)
+                    state = _GROUND  # other escape sequences are ignored
+            else:  # _CSI, collect the parameters up to the final character
+                code = text[i] if decode else ord(text[i])
+                if 0x30 <= code <= 0x39:  # digit
+                    if self._param < 0:
+                        self._param = code - 0x30
+                    else:
+                        self._param = self._param * 10 + code - 0x30
+                elif code == 0x3B:  # ";" parameter separator
+                    self._params.append(self._param)
+                    self._param = -1
+                elif code == 0x3F:  # "?" private mode
+                    self._private = True
+                elif 0x40 <= code <= 0x7E:  # final character
+                    self._params.append(self._param)
+                    command = self._csiCommands.get(chr(code))
+                    if command is not None:
+                        command(thisTerminal, self._params)
+                        thisTerminal = self._terminal()
+                        self._syncCursor(thisTerminal)
+                    state = _GROUND
+            i = i + 1
+        self._state = state
+
+    def _writeLine(self, thisTerminal, text):
+        # Fast path for text (without \r or \b) followed by clear EOL: writes the text and
+        # blanks the rest of the row in one pass, then moves the cursor to the end of the text.
+        # Returns False if the cursor is outside of thisTerminal.
+        column = thisTerminal.cursorX
+        row = thisTerminal.cursorY
+        if not ((0 <= column < thisTerminal.columns) and (0 <= row < thisTerminal.rows)):
+            return False
+        end = thisTerminal.writeLine(row, text, column, True)
+        thisTerminal.setCursor(end, row)
+        return True
+
+    def _terminal(self):
+        # returns the terminal that holds the cursor
+        if self.cursorY == self.statusRow:
+            return self.statusTerminal
+        return self.mainTerminal
+
+    def _syncCursor(self, thisTerminal):
+        # the editor cursor follows the cursor of the terminal that was written
+        self.cursorX = thisTerminal.cursorX
+        self.cursorY = self._terminalRow(thisTerminal)
+
+    def _terminalRow(self, thisTerminal):
+        # the editor row of the cursor in thisTerminal
+        if thisTerminal is self.statusTerminal:
+            return self.statusRow
+        return thisTerminal.cursorY
+
+    # CSI command handlers, params holds the numeric parameters (-1 if omitted)
+
+    def _csiSetCursor(self, thisTerminal, params):  ## 0: Set cursor
+        row = params[0]
+        col = params[1] if len(params) > 1 else -1
+        self.setCursor(max(col, 1) - 1, max(row, 1) - 1)
+
+    def _csiClearEOL(self, thisTerminal, params):  ## 1: Clear EOL, erase in line
+        thisTerminal.eraseInLine(max(params[0], 0))
+
+    def _csiEraseDisplay(self, thisTerminal, params):  # erase in display
+        # the display is the mainTerminal with the status line below it
+        mode=max(params[0], 0)
+        if mode == 2:
+            self.mainTerminal.eraseInDisplay(2)
+            self.statusTerminal.eraseInDisplay(2)
+        elif thisTerminal is self.statusTerminal:
+            if mode == 1:
+                self.mainTerminal.eraseInDisplay(2)
+            self.statusTerminal.eraseInLine(mode)
+        else:
+            self.mainTerminal.eraseInDisplay(mode)
+            if mode == 0:
+                self.statusTerminal.eraseInDisplay(2)
 
-        # Handle the following commands (from robert-hh/Micropython-Editor)
+    def _csiInsertLines(self, thisTerminal, params):
+        thisTerminal.insertLines(max(params[0], 1))
 
-##########ifdef VT100
-##    if termcap_vt100:
-        TERMCAP = (  ## list of terminal control strings
-            "\x1b[{row};{col}H",    ## 0: Set cursor
-            "\x1b[0K",              ## 1: Clear EOL
-            "\x1b[?25h",            ## 2: Cursor ON
-            "\x1b[?25l",            ## 3: Cursor OFF
-            "\x1b[0m",              ## 4: Hilite 0 - normal text
-            "\x1b[1;37;46m",        ## 5: Hilite 1 - Entering the status line
-            "\x1b[43m",             ## 6: Hilite 2 - Highlighting Text
-            '\x1b[?9h',             ## 7: Mouse reporting on
-            '\x1b[?9l',             ## 8: Mouse reporting off
-            "\x1bM",                ## 9: Scroll one line up
-            "\n",                   ## 10: Scroll one line down
-            '\x1b[1;{stop}r',       ## 11: Set lowest line of scrolling range
-            '\x1b[r',               ## 12: Scroll the full screen
-            '\x1b[999;999H\x1b[6n', ## 13: Report Screen size command
-                                    ## 14: Status line format. Elements may be omitted
-            "{chd}{file} Row: {row}/{total} Col: {col}  {msg}",
-            "\b"                    ## 15: backspace one character, used in line_edit
+    def _csiDeleteLines(self, thisTerminal, params):
+        thisTerminal.deleteLines(max(params[0], 1))
+
+    def _csiInsertChars(self, thisTerminal, params):
+        thisTerminal.insertChars(max(params[0], 1))
+
+    def _csiDeleteChars(self, thisTerminal, params):
+        thisTerminal.deleteChars(max(params[0], 1))
+
+    def _csiScrollRegion(self, thisTerminal, params):  ## 11/12: Set scrolling range
+        # the scroll region applies to the mainTerminal, the status row never scrolls
+        top = params[0]
+        bottom = params[1] if len(params) > 1 else -1
+        self.mainTerminal.setScrollRegion(
+            max(top, 1) - 1, None if bottom <= 0 else bottom - 1
         )
-############
 
-        # This may need to parse the input text in sections, in case multiples are sent ***
-        if text[:1]=="\x1b":# escape character
-            #print('found escape char')
-            if text[-1] == "H": ## 0: Set cursor
-                # get row, col  ****
-                row,col=text[2:-1].split(';',1) # split into max of two pieces
-                self.setCursor( int(col)-1, int(row)-1 ) # col, row
-            elif text == TERMCAP[1]: ## 1: Clear EOL
-                thisTerminal.clearEOL()
-            elif text == TERMCAP[2]: ## Cursor ON
-                thisTerminal.cursorOn()
-            elif text == TERMCAP[3]: ## Cursor OFF
-                thisTerminal.cursorOff()
-            elif text == TERMCAP[4]: ## 4: Hilite 0 - normal text
-                pass # not available at this time
-            elif text == TERMCAP[5]: ## 5: Hilite 1 - Entering the status line
-                pass # not available at this time
-            elif text == TERMCAP[6]: ## 6: Hilite 2 - Highlighting Text
-                pass # not available at this time
-            elif text == TERMCAP[7]: ## 7: Mouse reporting on
-                pass # not available at this time
-            elif text == TERMCAP[8]: ## 8: Mouse reporting on
-                pass # not available at this time
-            elif text == TERMCAP[9]: ## 9: Scroll one line up
-                thisTerminal.scrollUp()
-                                    ## 10: newline handled below
-
-            elif text[-1]=="r":  ## 11/12 - Set scrolling options
-                pass # not necessary for external display
-
-                                    ## 13: Report Screen size command
-                                    ## Use editorTerminal.getScreenSize()
-
-                                    ## 15: backspace one character
-                                    ## \b backspace handled by simpleTerminal.write()
-
-        elif text == TERMCAP[10]: ## 10: Scroll one line down
-            thisTerminal.scrollDown()
-        else:
-            thisTerminal.write(text)
+    def _csiGraphics(self, thisTerminal, params):  ## 4/5/6: Hilite (SGR)
+        # Select graphic rendition: 0 normal, 1 bold (bright), 7 reverse, 30-37/90-97 text color,
+        # 40-47/100-107 background color, 39/49 default colors.
+        for param in params:
+            if param <= 0:
+                self._bold = False
+                self._reverse = False
+                self._textColor = None
+                self._bgColor = None
+            elif param == 1:
+                self._bold = True
+            elif param == 7:
+                self._reverse = True
+            elif param == 27:
+                self._reverse = False
+            elif 30 <= param <= 37:
+                self._textColor = param - 30
+            elif param == 39:
+                self._textColor = None
+            elif 40 <= param <= 47:
+                self._bgColor = param - 40
+            elif param == 49:
+                self._bgColor = None
+            elif 90 <= param <= 97:
+                self._textColor = param - 90 + 8
+            elif 100 <= param <= 107:
+                self._bgColor = param - 100 + 8
+        textColor = None
+        bgColor = None
+        if self._textColor is not None:
+            color = self._textColor
+            if self._bold and color < 8:
+                color = color + 8
+            textColor = ANSI_COLORS[color]
+        if self._bgColor is not None:
+            bgColor = ANSI_COLORS[self._bgColor]
+        if self._reverse:
+            textColor, bgColor = (
+                self.bgColor if bgColor is None else bgColor,
+                self.textColor if textColor is None else textColor,
+            )
+        # the status line already has its own colors, highlights apply to the mainTerminal
+        self.mainTerminal.setAttribute(textColor, bgColor)
+
+    def _csiSetMode(self, thisTerminal, params):
+        if self._private and params[0] == 25:  ## 2: Cursor ON
+            thisTerminal.cursorOn()
+        # 7: Mouse reporting on - not available at this time
+
+    def _csiResetMode(self, thisTerminal, params):
+        if self._private and params[0] == 25:  ## 3: Cursor OFF
+            thisTerminal.cursorOff()
+        # 8: Mouse reporting off - not available at this time
 
     def write(self, text):
-        if self.cursorY==self.statusRow: # the text is to be written on the status row
-            #print('\nstatusTerminal\n\nwriting: ',text)
-            self.writeToTerminal(self.statusTerminal, text)
-        else:
-            self.writeToTerminal(self.mainTerminal, text)
+        self._beginUpdate()
+        try:
+            self.writeToTerminal(self._terminal(), text)
+        finally:
+            self._endUpdate()
 
     def setCursor(self, column, row):
-        self.cursorX=column
-        self.cursorY=row
-
-        if self.cursorY==self.statusRow: # if the cursor is on the status row, turn on the status cursor
-            self.statusTerminal.cursorOn() ##
-            self.statusTerminal.setCursor(column,0)
-        else: # cursor is in the mainTerminal
-            self.statusTerminal.cursorOff() #  turn off the status cursor
-            self.mainTerminal.setCursor(column,row) # set the cursor in the mainTerminal
+        self._beginUpdate()
+        try:
+            self.cursorX=column
+            self.cursorY=row
+
+            if self.cursorY==self.statusRow: # if the cursor is on the status row, turn on the status cursor
+                self.statusTerminal.cursorOn() ##
+                self.statusTerminal.setCursor(column,0)
+            else: # cursor is in the mainTerminal
+                self.statusTerminal.cursorOff() #  turn off the status cursor
+                self.mainTerminal.setCursor(column,row) # set the cursor in the mainTerminal
+        finally:
+            self._endUpdate()
 
     def cursor(self, onoff):
         if onoff:
@@ -484,36 +1933,139 @@ class editorTerminal:
             self.cursorOff()
 
     def cursorOff(self): # changes cursor for the mainTerminal only  *** double check
-        self.mainTerminal.cursorOff()
+        self._beginUpdate()
+        try:
+            self.mainTerminal.cursorOff()
+        finally:
+            self._endUpdate()
 
     def cursorOn(self): # changes cursor for mainTerminal only *** doublecheck
-        self.mainTerminal.cursorOn()
+        self._beginUpdate()
+        try:
+            self.mainTerminal.cursorOn()
+        finally:
+            self._endUpdate()
 
     def scrollUp(self, count=1):
-        self.display.auto_refresh=False
-        for i in range(count):
-            self.mainTerminal.scrollUp()
-        self.display.auto_refresh=True
+        self._beginUpdate()
+        try:
+            self.mainTerminal.scrollUp(count)
+        finally:
+            self._endUpdate()
 
     def scrollDown(self, count=1):
-        self.display.auto_refresh=False
-        for i in range(count):
-            self.mainTerminal.scrollDown()
-        self.display.auto_refresh=True
+        self._beginUpdate()
+        try:
+            self.mainTerminal.scrollDown(count)
+        finally:
+            self._endUpdate()
 
     def clearEOL(self):
-        self.display.auto_refresh=False
-        if self.cursorY==self.statusRow: # if the cursor is on the status row
-            self.statusTerminal.clearEOL()
-        else:
-            self.mainTerminal.clearEOL()
-        self.display.auto_refresh=True
+        self._beginUpdate()
+        try:
+            if self.cursorY==self.statusRow: # if the cursor is on the status row
+                self.statusTerminal.clearEOL()
+            else:
+                self.mainTerminal.clearEOL()
+        finally:
+            self._endUpdate()
 
     def clearAll(self):
-        if self.cursorY==self.statusRow: # if the cursor is on the status row,
-            self.statusTerminal.clearAll()
-        else:
-            self.mainTerminal.clearAll()
+        self._beginUpdate()
+        try:
+            if self.cursorY==self.statusRow: # if the cursor is on the status row,
+                self.statusTerminal.clearAll()
+            else:
+                self.mainTerminal.clearAll()
+        finally:
+            self._endUpdate()
+
+    def setStatus(self, **fields):
+        # Update fields of the TERMCAP 14 status line, for example setStatus(row=12, col=3).
+        # The other fields keep their last value.  Only the fields whose text changed are
+        # redrawn, if a field changed its length the rest of the line after it is redrawn.
+        # With statusHz, the status line is redrawn at most statusHz times per second, changes
+        # that come sooner are redrawn by tick().  Returns True if the status line was redrawn.
+        self._statusFields.update(fields)
+        if self.statusHz is not None:
+            now=time.monotonic()
+            if now < self._nextStatus:
+                self._statusPending=True
+                return False
+            self._nextStatus=now+1/self.statusHz
+        self._statusPending=False
+        self._drawStatus()
+        return True
+
+    def _drawStatus(self):
+        if self._statusSegments is None:
+            self._statusSegments=self._parseStatusFormat(self.TERMCAP[14])
+        texts=[]
+        for text, name in self._statusSegments:
+            if name is not None:
+                text=text.format(self._statusFields.get(name, ""))
+            texts.append(text)
+        status=self.statusTerminal
+        old=self._statusTexts
+        self._beginUpdate()
+        try:
+            if old is None or status.outputCount != self._statusCount:
+                status.writeLine(0, "".join(texts)) # the status line was written by something else
+            else:
+                column=0
+                for i in range(len(texts)):
+                    if texts[i] != old[i]:
+                        if len(texts[i]) != len(old[i]): # the rest of the line moves
+                            status.writeLine(0, "".join(texts[i:]), column)
+                            break
+                        status.writeAt(column, 0, texts[i])
+                    column+=len(texts[i])
+            self._statusTexts=texts
+            self._statusCount=status.outputCount
+        finally:
+            self._endUpdate()
+
+    def _parseStatusFormat(self, statusFormat):
+        # split a status format into segments: (literal text, None) and for each {name} or
+        # {name:spec} field ("{0:spec}", name), the format of the field's value
+        segments=[]
+        while statusFormat:
+            start=statusFormat.find("{")
+            if start < 0:
+                start=len(statusFormat)
+            if start > 0:
+                segments.append((statusFormat[:start], None))
+            end=statusFormat.find("}", start)
+            if start == len(statusFormat) or end < 0:
+                break
+            field=statusFormat[start+1:end]
+            name=field.split(":")[0].split("!")[0]
+            segments.append(("{0" + field[len(name):] + "}", name))
+            statusFormat=statusFormat[end+1:]
+        return segments
+
+    def tick(self, now=None):
+        # draw the status line fields that waited for the statusHz rate limit, then see _paneDisplay
+        if self._statusPending:
+            if now is None:
+                now=time.monotonic()
+            if now >= self._nextStatus:
+                self._statusPending=False
+                self._nextStatus=now+1/self.statusHz
+                self._drawStatus()
+        _paneDisplay.tick(self, now)
+
+    def renderFrame(self, lines, status=None):
+        # Draw a whole frame with simpleTerminal.render: lines are the rows of the mainTerminal
+        # and status, if not None, is the status line.  Returns the number of rows that changed.
+        self._beginUpdate()
+        try:
+            changed=self.mainTerminal.render(lines)
+            if status is not None:
+                changed+=self.statusTerminal.render((status,))
+        finally:
+            self._endUpdate()
+        return changed
 
     def getScreenSize(self):
         totalScreenSize=[self.mainTerminal.rows+self.statusTerminal.rows, self.mainTerminal.columns]
@@ -521,5 +2073,359 @@ class editorTerminal:
         return totalScreenSize # rows, columns
 
 
+class paneManager(_paneDisplay):
+    # Several simpleTerminal panes stacked from the top of one display, for example a log,
+    # some metrics and a status line.  The cursor position is absolute (display rows), writes
+    # go to the pane that holds the cursor, found with a row to pane lookup table.
+    # The panes share the font's glyph table and the palettes of the same colors, and all
+    # of them are refreshed together by one flush() (see _paneDisplay).
+    #
+    # manager = paneManager(display, targetFPS=30)
+    # log = manager.addPane(12, autoWrap=True)
+    # status = manager.addPane(1, bgColor=0xFFFFFF, textColor=0x000000, cursorDisplay=False)
+    __slots__ = (
+        "font", "columns", "rows", "rowPanes", "paneTops", "cursorX", "cursorY", "cursorShown",
+    )
+
+    def __init__(
+        self,
+        display,
+        columns=None, # default: as many as fit on the display
+        font=terminalio.FONT,
+        maxPanes=6,
+        targetFPS=None, # if set, auto_refresh is turned off and refreshes are limited to this rate
+        blinkPeriod=None, # seconds between cursor blinks, the default for the panes
+    ):
+        self.display = display
+        self.font = font
+        if columns is None:
+            columns = display.width // font.get_bounding_box()[0]
+        self.columns = columns
+        self.rows = 0  # the display rows used by the panes
+        self.panes = []
+        self.rowPanes = bytearray()  # the pane index of each display row
+        self.paneTops = []  # the display row of the top of each pane
+        self.cursorX = 0
+        self.cursorY = 0
+        self.cursorShown = True
+        self.displayGroup = displayio.Group(max_size=maxPanes, scale=1)
+
+        self.targetFPS = targetFPS
+        self.blinkPeriod = blinkPeriod
+        self._updateDepth = 0
+        self._nextFrame = 0
+        self.display.auto_refresh = targetFPS is None
+        self.display.show(self.displayGroup)
+
+    def addPane(self, rows, **kwargs):
+        # Add a pane of rows text rows below the other panes and return its simpleTerminal,
+        # the keyword arguments are passed to simpleTerminal (colors, cursorDisplay, autoWrap,
+        # scrollback, stats, ...).  The pane is placed by moving its displayGroup.
+        kwargs.setdefault("blinkPeriod", self.blinkPeriod)
+        if kwargs.get("stats") is None:
+            terminalClass = simpleTerminal
+        else:
+            terminalClass = statsSimpleTerminal  # time the pane's operations
+        pane = terminalClass(rows=rows, columns=self.columns, font=self.font, **kwargs)
+        pane.displayGroup.y = self.rows * pane.fontH
+        if self._updateDepth:
+            pane.beginDeferred()  # added during an update, see _beginUpdate
+        if len(self.panes) != 0 or self.cursorY != 0 or not self.cursorShown:
+            pane.cursorOff()  # the cursor starts in the first pane
+        self.rowPanes.extend(bytes([len(self.panes)]) * rows)
+        self.paneTops.append(self.rows)
+        self.rows += rows
+        self.panes.append(pane)
+        self.displayGroup.append(pane.displayGroup)
+        return pane
+
+    def paneAt(self, row):
+        # returns (pane, row in the pane) for a display row, or (None, row) outside the panes
+        if 0 <= row < self.rows:
+            index = self.rowPanes[row]
+            return self.panes[index], row - self.paneTops[index]
+        return None, row
+
+    def setCursor(self, column, row):
+        # move the cursor to a display position, it is shown in the pane that holds it
+        self._beginUpdate()
+        try:
+            old, oldRow = self.paneAt(self.cursorY)
+            pane, paneRow = self.paneAt(row)
+            if old is not None and old is not pane:
+                old.cursorOff()
+            self.cursorX = column
+            self.cursorY = row
+            if pane is not None:
+                pane.setCursor(column, paneRow)
+                if self.cursorShown:
+                    pane.cursorOn()
+        finally:
+            self._endUpdate()
+
+    def write(self, text):
+        # write text at the cursor into the pane that holds it, the pane wraps and scrolls
+        # by its own settings, the text never moves to another pane
+        pane, paneRow = self.paneAt(self.cursorY)
+        if pane is None:
+            return
+        self._beginUpdate()
+        try:
+            pane.write(text)
+            self.cursorX = pane.cursorX
+            self.cursorY = self.cursorY - paneRow + pane.cursorY
+        finally:
+            self._endUpdate()
+
+    def writeAt(self, column, row, text):
+        # write text at a display position without moving the cursor
+        pane, paneRow = self.paneAt(row)
+        if pane is not None:
+            self._beginUpdate()
+            try:
+                pane.writeAt(column, paneRow, text)
+            finally:
+                self._endUpdate()
+
+    def cursorOff(self):
+        self.cursorShown = False
+        pane, paneRow = self.paneAt(self.cursorY)
+        if pane is not None:
+            self._beginUpdate()
+            try:
+                pane.cursorOff()
+            finally:
+                self._endUpdate()
+
+    def cursorOn(self):
+        self.cursorShown = True
+        pane, paneRow = self.paneAt(self.cursorY)
+        if pane is not None:
+            self._beginUpdate()
+            try:
+                pane.cursorOn()
+            finally:
+                self._endUpdate()
+
+    def clearAll(self):
+        # clear every pane
+        self._beginUpdate()
+        try:
+            for pane in self.panes:
+                pane.clearAll()
+        finally:
+            self._endUpdate()
+
+    def getScreenSize(self):
+        return [self.rows, self.columns]  # rows, columns
+
+    def deinit_display(self):
+        self.display.show(None)
 
 
+class terminalPump:
+    # Feeds a terminal from a stream, such as a UART, a socket or a pipe: anything with
+    # readinto(buffer) that returns the number of bytes read, None when there is nothing
+    # to read (a UART timeout or a non-blocking pipe) and 0 at the end of a file or pipe.
+    # OSError EAGAIN also means nothing to read and EIO the end of the stream (a pty), any
+    # other error is raised.
+    # Call pump() once per frame, or run the asyncio task run().  Each frame reads at most
+    # budget bytes into one preallocated buffer, writes them to the terminal (the buffer, or
+    # a memoryview slice of it, see write()) with the scrolls deferred to the end of the
+    # frame, and refreshes the display once.
+    #
+    # pump = terminalPump(uart, editor, budget=2048)
+    # while True:
+    #     pump.pump()
+    __slots__ = (
+        "source", "terminal", "buffer", "view", "budget", "update", "bytesRead", "frames",
+        "fullFrames", "start", "behindSince", "lag", "maxLag", "eof",
+    )
+
+    def __init__(self, source, terminal, bufferSize=256, budget=2048):
+        self.source = source
+        self.terminal = terminal
+        self.buffer = bytearray(bufferSize)
+        self.view = memoryview(self.buffer)
+        self.budget = budget  # bytes read per frame at most, so a burst cannot stall the display
+        # editorTerminal and paneManager: hold the refresh for the whole frame, then flush once
+        # (this also defers the scrolls), a simpleTerminal only defers its scrolls.  Not
+        # isinstance, so a terminalRecorder in front of the terminal works the same.
+        self.update = hasattr(terminal, "_beginUpdate")
+        self.reset()
+
+    def reset(self):
+        # statistics: bytes and frames so far, frames that used the whole budget (the source
+        # had more to read), and the lag: the seconds since the source was last read empty
+        self.bytesRead = 0
+        self.frames = 0
+        self.fullFrames = 0
+        self.start = time.monotonic()
+        self.behindSince = None
+        self.lag = 0
+        self.maxLag = 0
+        self.eof = False
+
+    def pump(self, now=None):
+        # read and write up to budget bytes, then refresh; returns the number of bytes read
+        terminal = self.terminal
+        size = len(self.buffer)
+        total = 0
+        if self.update:
+            terminal._beginUpdate()
+        else:
+            terminal.beginDeferred()
+        try:
+            while total < self.budget:
+                try:
+                    if self.budget - total >= size:
+                        wanted = size
+                        count = self.source.readinto(self.buffer)
+                    else:
+                        wanted = self.budget - total
+                        count = self.source.readinto(self.view[:wanted])
+                except OSError as error:
+                    if error.args[0] == errno.EIO:  # a pty reports the end of the stream as EIO
+                        count = 0
+                    elif error.args[0] == errno.EAGAIN:  # nothing to read this frame
+                        count = None
+                    else:
+                        raise
+                if not count:
+                    if count == 0:
+                        self.eof = True  # the end of the file or pipe
+                    break
+                # a full buffer is passed as is, editorTerminal can search a bytearray with find()
+                terminal.write(self.buffer if count == size else self.view[:count])
+                total += count
+                if count < wanted:
+                    break  # the source has nothing more for now
+        finally:
+            if self.update:
+                terminal._endUpdate()
+            else:
+                terminal.endDeferred()
+        if self.update:
+            terminal.flush()
+
+        if now is None:
+            now = time.monotonic()
+        self.frames += 1
+        self.bytesRead += total
+        if total >= self.budget:  # there may be more to read, the terminal is behind
+            self.fullFrames += 1
+            if self.behindSince is None:
+                self.behindSince = now
+            self.lag = now - self.behindSince
+            self.maxLag = max(self.maxLag, self.lag)
+        else:
+            self.behindSince = None
+            self.lag = 0
+        return total
+
+    def bytesPerSecond(self, now=None):
+        # the average rate since the pump was created or reset
+        if now is None:
+            now = time.monotonic()
+        if now <= self.start:
+            return 0
+        return self.bytesRead / (now - self.start)
+
+    async def run(self, fps=30):
+        # asyncio task that pumps fps times per second until the end of the stream
+        import asyncio
+
+        while not self.eof:
+            self.pump()
+            await asyncio.sleep(1 / fps)
+
+
+class terminalRecorder:
+    # Records the calls to a terminal into a line based trace, to replay them later with
+    # benchmarks/replay.py.  Use the recorder in place of the terminal:
+    #     editor = terminalRecorder(editorTerminal(display, 240, 240), open("trace.txt", "w"))
+    # The first line is "# <class> <rows> <columns>", then each recorded call is one line of
+    # tab separated fields: seconds since the recorder was created, the function name, the
+    # repr of the arguments and, if there were keyword arguments, the repr of those.
+    # The calls to the other functions and attributes are passed on without recording.
+    __slots__ = ("terminal", "stream", "start")
+
+    RECORDED = (
+        "write", "setCursor", "cursor", "cursorOn", "cursorOff", "scrollUp", "scrollDown",
+        "lineFeed", "reverseIndex", "clearEOL", "clearAll", "fill", "insertLines",
+        "deleteLines", "insertChars", "deleteChars", "writeLine", "writeAt", "render",
+        "renderFrame", "setScrollRegion", "setAttribute", "flush",
+    )
+
+    def __init__(self, terminal, stream):
+        self.terminal = terminal
+        self.stream = stream
+        self.start = _ticks()
+        if isinstance(terminal, editorTerminal):
+            rows, columns = terminal.getScreenSize()
+            kind = "editorTerminal"
+        else:
+            rows, columns = terminal.rows, terminal.columns
+            kind = "simpleTerminal"
+        stream.write("# {} {} {}\n".format(kind, rows, columns))
+
+    def __getattr__(self, name):
+        attribute = getattr(self.terminal, name)
+        if name not in self.RECORDED:
+            return attribute
+
+        def recorded(*args, **kwargs):
+            saved = args
+            if args and isinstance(args[0], (bytearray, memoryview)):
+                # saved as bytes, the trace is read back with ast.literal_eval
+                saved = (bytes(args[0]),) + args[1:]
+            line = "{:.6f}\t{}\t{}".format(
+                (_ticks() - self.start) * _TICK_SECONDS, name, repr(saved)
+            )
+            if kwargs:
+                line += "\t" + repr(kwargs)
+            self.stream.write(line + "\n")
+            return attribute(*args, **kwargs)
+
+        return recorded
+
+
+# The instrumented terminals, create them with stats=terminalStats() to time the operations
+# by name, for example statsSimpleTerminal(rows=17, columns=40, stats=stats)
+
+class statsSimpleTerminal(simpleTerminal):
+    __slots__ = ()
+
+    def tileIndex(self, code):
+        if code >= 128:
+            self.stats.counts["glyphLookups"] += 1  # a font lookup
+        return simpleTerminal.tileIndex(self, code)
+
+
+for _name in (
+    "write", "writeChar", "writeLine", "writeAt", "writeBlank", "render", "setCursor",
+    "scrollUp", "scrollDown", "lineFeed", "reverseIndex", "clearEOL", "clearAll", "fill",
+    "setViewOffset", "setAttribute", "insertLines", "deleteLines", "insertChars", "deleteChars",
+):
+    setattr(statsSimpleTerminal, _name, _timed(_name, getattr(simpleTerminal, _name)))
+# every scroll, including the batched scrolls of autoWrap, counts as a "scroll"
+statsSimpleTerminal._scroll = _timed("scroll", simpleTerminal._scroll)
+statsSimpleTerminal._deferredScroll = _timed("scroll", simpleTerminal._deferredScroll)
+
+
+class statsEditorTerminal(editorTerminal):
+    # its main and status terminals are statsSimpleTerminals
+    __slots__ = ()
+    terminalClass = statsSimpleTerminal
+
+    def flush(self):
+        start = _ticks()
+        refreshed = editorTerminal.flush(self)
+        self.stats.add("editor.flush", _ticks() - start)
+        if refreshed:
+            self.stats.counts["refreshes"] += 1
+        return refreshed
+
+
+for _name in ("write", "renderFrame", "setStatus", "setCursor", "scrollUp", "scrollDown", "clearEOL", "clearAll"):
+    setattr(statsEditorTerminal, _name, _timed("editor." + _name, getattr(editorTerminal, _name)))